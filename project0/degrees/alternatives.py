@@ -0,0 +1,182 @@
+"""
+Alternative connection chains: every shortest path between two people,
+and the k shortest simple paths.
+
+Both are read off one set of breadth-first layers grown from the target,
+which give the distance to the target of every person within some
+radius. The shortest paths are exactly the chains that step one layer
+closer at every edge, so they form a predecessor DAG that is enumerated
+lazily. Longer simple paths are found by a depth-first search that
+prunes every person too far from the target for the remaining length,
+growing the same layers by one more step when it needs them. No search
+is repeated per alternative.
+
+`neighbors(person)` yields every (movie, person) pair of a person, with
+either person_ids or Graph indexes.
+"""
+
+
+class Layers():
+    def __init__(self, neighbors, target):
+        self.neighbors = neighbors
+
+        # Person -> number of edges to the target, for everyone within
+        # `radius` edges, and the people exactly `radius` edges away
+        self.distances = {target: 0}
+        self.radius = 0
+        self.layer = [target]
+
+    def extend(self):
+        """
+        Grows the layers by one edge. Returns False once every person
+        connected to the target has been reached.
+        """
+        if not self.layer:
+            return False
+        distances = self.distances
+        distance = self.radius + 1
+        next_layer = []
+        for person in self.layer:
+            for _, neighbor in self.neighbors(person):
+                if neighbor not in distances:
+                    distances[neighbor] = distance
+                    next_layer.append(neighbor)
+        self.layer = next_layer
+        self.radius = distance
+        return True
+
+    def reach(self, person):
+        """
+        Grows the layers until they contain a person and returns its
+        distance to the target, or None if it is not connected.
+        """
+        while person not in self.distances:
+            if not self.extend():
+                return None
+        return self.distances[person]
+
+    def within(self, person, budget):
+        """
+        Returns whether a person is at most `budget` edges from the target.
+        """
+        distance = self.distances.get(person)
+        return distance is not None and distance <= budget
+
+
+def shortest_path_dag(neighbors, source, target):
+    """
+    Returns the predecessor DAG of all shortest paths from the source
+    to the target as a dictionary mapping every person on one of them
+    (but the target) to its (movie, person) steps one edge closer to the
+    target. Returns None if the two are not connected.
+    """
+    layers = Layers(neighbors, target)
+    distance = layers.reach(source)
+    if distance is None:
+        return None
+
+    dag = {}
+    layer = [source]
+    for remaining in range(distance, 0, -1):
+        next_layer = {}
+        for person in layer:
+            steps = dag[person] = []
+            for movie, neighbor in neighbors(person):
+                if layers.distances.get(neighbor) == remaining - 1:
+                    steps.append((movie, neighbor))
+                    next_layer[neighbor] = None
+        layer = next_layer
+    return dag
+
+
+def all_shortest_paths(neighbors, source, target):
+    """
+    Lazily yields every shortest list of (movie, person) pairs from the
+    source to the target. Yields nothing if they are not connected.
+    """
+    dag = shortest_path_dag(neighbors, source, target)
+    if dag is None:
+        return
+    if source == target:
+        yield []
+        return
+
+    # Depth-first over the DAG, one iterator of steps per path position
+    path = []
+    stack = [iter(dag[source])]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            if path:
+                path.pop()
+            continue
+        path.append(step)
+        if step[1] == target:
+            yield list(path)
+            path.pop()
+        else:
+            stack.append(iter(dag[step[1]]))
+
+
+def k_shortest_paths(neighbors, source, target, k):
+    """
+    Returns up to `k` simple lists of (movie, person) pairs from the
+    source to the target, shortest first. Paths of the same length are
+    distinct if they differ in a person or a movie.
+    """
+    layers = Layers(neighbors, target)
+    length = layers.reach(source)
+    if length is None or k <= 0:
+        return []
+    if source == target:
+        return [[]]
+
+    paths = []
+    while len(paths) < k:
+        # The people on a path of `length` edges are all within
+        # length - 1 edges of the target
+        while layers.radius < length - 1 and layers.extend():
+            pass
+        for path in simple_paths(neighbors, layers, source, target, length):
+            paths.append(path)
+            if len(paths) == k:
+                break
+        length += 1
+
+        # A simple path visits every person of the component at most once
+        if not layers.layer and length >= len(layers.distances):
+            break
+    return paths
+
+
+def simple_paths(neighbors, layers, source, target, length):
+    """
+    Yields every simple path of exactly `length` edges from the source to
+    the target, skipping people who cannot reach the target in the
+    edges left.
+    """
+    path = []
+    on_path = {source}
+    stack = [iter(neighbors(source))]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            if path:
+                on_path.discard(path.pop()[1])
+            continue
+
+        movie, person = step
+        remaining = length - len(path) - 1
+        if person in on_path or not layers.within(person, remaining):
+            continue
+        if person == target:
+            if remaining == 0:
+                yield path + [step]
+            continue
+        if remaining == 0:
+            continue
+        path.append(step)
+        on_path.add(person)
+        stack.append(iter(neighbors(person)))
@@ -0,0 +1,201 @@
+"""
+Degree distribution analytics over the compact Graph.
+
+Breadth-first searches from up to 64 people run at once as one
+multi-source BFS: every person carries a 64-bit mask of the searches
+that have reached it and a mask of the searches for which it is on the
+current frontier. One level of all searches is one pass over the edges
+of the frontier people, where a movie ORs together the frontier masks of
+its stars and hands them on to its whole cast. For every source the
+searches produce the number of people at each distance, from which the
+eccentricity, the average degrees of separation and the closeness
+centrality follow.
+
+    python analytics.py large --people 102 158
+    python analytics.py large --sample 640 --workers 8 --output stats.json
+"""
+import argparse
+import json
+import random
+import sys
+from array import array
+
+import batch
+import degrees
+
+# Searches run at once, one bit of a mask each
+WIDTH = 64
+
+
+def multi_source_bfs(graph, sources, movie_filter=None):
+    """
+    Runs a breadth-first search from each of up to 64 person indexes at
+    once, through the movies allowed by `movie_filter` if given. Returns
+    one histogram per source: the number of people at each distance,
+    starting with the source itself at distance 0.
+    """
+    if len(sources) > WIDTH:
+        raise ValueError(f"at most {WIDTH} sources per search, got {len(sources)}")
+    allowed = None if movie_filter is None or movie_filter.empty() else movie_filter.mask(graph)
+    movies_of, stars_of = graph.movies_of, graph.stars_of
+
+    # Person -> searches that reached it, and searches it is on the frontier of
+    seen = array("Q", [0]) * len(graph.person_ids)
+    visit = array("Q", [0]) * len(graph.person_ids)
+    # Movie -> searches that reach its cast on the next level
+    carried = array("Q", [0]) * len(graph.movie_ids)
+
+    for bit, source in enumerate(sources):
+        seen[source] |= 1 << bit
+        visit[source] |= 1 << bit
+    histograms = [[1] for _ in sources]
+    frontier = list(dict.fromkeys(sources))
+
+    while frontier:
+        movies = []
+        for person in frontier:
+            bits = visit[person]
+            visit[person] = 0
+            for movie in movies_of(person):
+                if allowed is not None and not allowed[movie]:
+                    continue
+                if not carried[movie]:
+                    movies.append(movie)
+                carried[movie] |= bits
+
+        next_frontier = []
+        for movie in movies:
+            bits = carried[movie]
+            carried[movie] = 0
+            for star in stars_of(movie):
+                new = bits & ~seen[star]
+                if new:
+                    if not visit[star]:
+                        next_frontier.append(star)
+                    visit[star] |= new
+                    seen[star] |= new
+
+        counts = [0] * len(sources)
+        for person in next_frontier:
+            bits = visit[person]
+            while bits:
+                lowest = bits & -bits
+                counts[lowest.bit_length() - 1] += 1
+                bits ^= lowest
+        for histogram, count in zip(histograms, counts):
+            if count:
+                histogram.append(count)
+        frontier = next_frontier
+
+    return histograms
+
+
+def summarize(histogram, num_people):
+    """
+    Returns the statistics of one source from its distance histogram.
+    Closeness is scaled by the share of people reached (Wasserman and
+    Faust), so it stays comparable across components of different sizes.
+    """
+    reached = sum(histogram)
+    total = sum(distance * count for distance, count in enumerate(histogram))
+    others = reached - 1
+    return {
+        "reached": reached,
+        "eccentricity": len(histogram) - 1,
+        "average_degrees": total / others if others else None,
+        "closeness": others / (num_people - 1) * others / total if total else 0.0,
+        "histogram": histogram,
+    }
+
+
+def analyze(graph, person_ids, movie_filter=None, workers=1, directory=None, snapshot=False):
+    """
+    Returns a dictionary mapping every person_id to its statistics, with
+    one multi-source BFS per 64 people. With more than one worker the
+    searches run in a process pool over degrees.graph, which workers that
+    are not forked load from `directory`.
+    """
+    indexes = [graph.person_index[person_id] for person_id in person_ids]
+    batches = [(indexes[i:i + WIDTH], movie_filter) for i in range(0, len(indexes), WIDTH)]
+    if workers <= 1 or len(batches) <= 1:
+        histograms = [multi_source_bfs(graph, *search) for search in batches]
+    else:
+        with batch.make_pool(workers, directory, snapshot) as pool:
+            histograms = pool.map(search_batch, batches)
+
+    results = {}
+    num_people = len(graph.person_ids)
+    for (sources, _), found in zip(batches, histograms):
+        for source, histogram in zip(sources, found):
+            results[graph.person_ids[source]] = summarize(histogram, num_people)
+    return results
+
+
+def search_batch(search):
+    """
+    Runs one multi-source BFS over degrees.graph in a worker process.
+    """
+    return multi_source_bfs(degrees.graph, *search)
+
+
+def overview(results):
+    """
+    Combines the statistics of many sources into the histogram of
+    distances over all (source, person) pairs, the histogram of
+    eccentricities and the mean closeness.
+    """
+    distances = []
+    eccentricities = {}
+    for result in results.values():
+        for distance, count in enumerate(result["histogram"]):
+            if distance == len(distances):
+                distances.append(0)
+            distances[distance] += count
+        eccentricities[result["eccentricity"]] = eccentricities.get(result["eccentricity"], 0) + 1
+
+    pairs = sum(distances[1:])
+    return {
+        "sources": len(results),
+        "distance_histogram": distances,
+        "eccentricity_histogram": {str(key): eccentricities[key] for key in sorted(eccentricities)},
+        "average_degrees": sum(d * c for d, c in enumerate(distances)) / pairs if pairs else None,
+        "mean_closeness": sum(r["closeness"] for r in results.values()) / len(results) if results else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distance histograms, eccentricity and closeness of people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--people", nargs="*", default=[], metavar="ID", help="person ids to analyze")
+    parser.add_argument("--sample", type=int, default=0, metavar="N", help="also analyze N random people")
+    parser.add_argument("--all", action="store_true", help="analyze everyone")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--snapshot", action="store_true", help="map the graph from a binary snapshot")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True, snapshot=args.snapshot)
+    graph = degrees.graph
+    if args.all:
+        person_ids = list(graph.person_ids)
+    else:
+        person_ids = list(args.people)
+        if args.sample:
+            person_ids += random.Random(args.seed).sample(graph.person_ids, min(args.sample, len(graph.person_ids)))
+    for person_id in person_ids:
+        if person_id not in graph.person_index:
+            sys.exit(f"Unknown person {person_id}")
+
+    results = analyze(graph, list(dict.fromkeys(person_ids)), workers=args.workers,
+                      directory=args.directory, snapshot=args.snapshot)
+    report = {"overview": overview(results), "people": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
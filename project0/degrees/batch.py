@@ -0,0 +1,134 @@
+"""
+Batch degrees of separation.
+
+Reads (source, target) person id pairs, one CSV row per pair, from a file
+or stdin and writes one JSON line per pair. The graph is loaded once and
+shared with the worker processes; pairs with the same source are answered
+by a single breadth-first search.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Degrees of separation for many pairs of people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("pairs", nargs="?", default="-", help="CSV file of source,target person ids (default: stdin)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--snapshot", action="store_true", help="map the graph from a binary snapshot")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True, snapshot=args.snapshot)
+
+    if args.pairs == "-":
+        pairs = read_pairs(sys.stdin)
+        run(pairs, args.workers, sys.stdout, args.directory, args.snapshot)
+    else:
+        with open(args.pairs, encoding="utf-8") as f:
+            pairs = read_pairs(f)
+            run(pairs, args.workers, sys.stdout, args.directory, args.snapshot)
+
+
+def read_pairs(f):
+    """
+    Returns the (source, target) pairs of a CSV file, skipping blank rows
+    and a `source,target` header.
+    """
+    pairs = []
+    for row in csv.reader(f):
+        if len(row) < 2 or row[:2] == ["source", "target"]:
+            continue
+        pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def group_by_source(pairs):
+    """
+    Returns a list of (source, targets) groups in order of first appearance.
+    """
+    groups = {}
+    for source, target in pairs:
+        groups.setdefault(source, []).append(target)
+    return list(groups.items())
+
+
+def run(pairs, workers, output, directory=None, snapshot=False):
+    """
+    Answers every pair and writes the results to `output` as JSON lines,
+    as soon as each source group is done.
+    """
+    groups = group_by_source(pairs)
+    if workers <= 1:
+        for results in map(solve_group, groups):
+            write_results(results, output)
+        return
+
+    with make_pool(workers, directory, snapshot) as pool:
+        for results in pool.imap_unordered(solve_group, groups, chunksize=16):
+            write_results(results, output)
+
+
+def make_pool(workers, directory, snapshot):
+    """
+    Returns a process pool sharing the loaded graph. With fork the workers
+    inherit it copy-on-write; otherwise each worker loads it once.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork").Pool(workers)
+    return multiprocessing.Pool(workers, initializer=degrees.load_data, initargs=(directory, True, snapshot))
+
+
+def solve_group(group):
+    """
+    Returns the result records of all pairs that share a source.
+    """
+    source, targets = group
+    graph = degrees.graph
+    if source not in graph.person_index:
+        return [result(source, target, error="unknown person") for target in targets]
+
+    # Disconnected targets would make the search exhaust the source's component
+    known = [target for target in targets if target in graph.person_index]
+    paths = graph.paths_from(source, [target for target in known if degrees.connected(source, target)])
+    paths.update((target, None) for target in known if target not in paths)
+
+    results = []
+    for target in targets:
+        if target in paths:
+            results.append(result(source, target, paths[target]))
+        else:
+            results.append(result(source, target, error="unknown person"))
+    return results
+
+
+def result(source, target, path=None, error=None):
+    """
+    Returns the JSON record of one pair.
+    """
+    record = {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+    }
+    if error is not None:
+        record["error"] = error
+    return record
+
+
+def write_results(results, output):
+    """
+    Writes result records as JSON lines and flushes them right away.
+    """
+    for record in results:
+        output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark degrees loading and queries on a dataset directory.
+
+Every load mode runs in its own forked process, so load time and peak RSS
+are measured from a clean start. All modes answer the same seeded set of
+(source, target) queries between people of the largest connected
+component, and the results are printed as JSON.
+
+    python synthetic.py /tmp/imdb --people 200000 --movies 100000
+    python benchmark.py /tmp/imdb --queries 200 --output results.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from collections import Counter
+
+import degrees
+from components import Components
+from graph import Graph
+from landmarks import load_index
+
+MODES = ("dict", "compact", "snapshot")
+
+
+def sample_queries(directory, count, seed):
+    """
+    Returns `count` (source, target) person_id pairs drawn with a fixed
+    seed from the largest connected component. Pairs of people who are
+    not connected are answered by the component check without a search,
+    so they would time that check instead.
+    """
+    graph = Graph.from_csv(directory)
+    labels = Components.from_graph(graph).labels
+    largest = Counter(labels).most_common(1)[0][0] if labels else None
+    person_ids = [person_id for person_id, label in zip(graph.person_ids, labels) if label == largest]
+    rng = random.Random(seed)
+    return [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(count)]
+
+
+def percentiles(samples):
+    """
+    Returns the mean, p50, p90, p99 and max of latencies in seconds.
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "max": ordered[-1],
+    }
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the seconds a call took and its result.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def time_queries(queries, **options):
+    """
+    Times degrees.shortest_path over every query and returns the latency
+    percentiles with the degrees of separation found.
+    """
+    latencies = []
+    lengths = []
+    for source, target in queries:
+        seconds, path = timed(degrees.shortest_path, source, target, **options)
+        latencies.append(seconds)
+        lengths.append(None if path is None else len(path))
+    return dict(percentiles(latencies), degrees=lengths)
+
+
+def run_mode(directory, mode, queries, landmarks):
+    """
+    Loads the dataset in one mode and times every query. Runs in a fresh
+    forked process.
+    """
+    load_seconds, _ = timed(degrees.load_data, directory, compact=mode == "compact", snapshot=mode == "snapshot")
+    # The dictionaries label their components on the first query, so the
+    # labels are built before the queries are timed
+    components_seconds = timed(degrees.connected, *queries[0])[0] if queries else 0.0
+    neighbor_times = [timed(degrees.neighbors_for_person, source)[0] for source, _ in queries]
+
+    searches = {
+        "bfs": time_queries(queries),
+        "bidirectional": time_queries(queries, bidirectional=True),
+    }
+    if landmarks and degrees.graph is not None:
+        index_seconds, degrees.landmark_index = timed(load_index, degrees.graph, directory, landmarks)
+        searches["astar"] = dict(time_queries(queries), index_seconds=index_seconds)
+
+    return {
+        "load_seconds": load_seconds,
+        "components_seconds": components_seconds,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "neighbors": percentiles(neighbor_times),
+        "searches": searches,
+    }
+
+
+def prepare_snapshot(directory, landmarks):
+    """
+    Writes the snapshot and index files, so the snapshot mode measures
+    a warm start.
+    """
+    degrees.load_data(directory, snapshot=True, landmarks=landmarks)
+
+
+def in_child(function, *args):
+    """
+    Runs a function in a freshly forked process and returns its result.
+    """
+    context = multiprocessing.get_context("fork")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(function, *args).result()
+
+
+def benchmark(directory, modes, num_queries, seed, landmarks):
+    """
+    Returns the benchmark results of every mode as a JSON-serializable dictionary.
+    """
+    queries = in_child(sample_queries, directory, num_queries, seed) if num_queries else []
+    if "snapshot" in modes:
+        in_child(prepare_snapshot, directory, landmarks)
+
+    results = {}
+    for mode in modes:
+        results[mode] = in_child(run_mode, directory, mode, queries, landmarks)
+
+    # Every mode and method has to agree on the degrees of separation
+    lengths = [
+        tuple(search.pop("degrees"))
+        for result in results.values() for search in result["searches"].values()
+    ]
+    return {
+        "directory": directory,
+        "seed": seed,
+        "queries": num_queries,
+        "landmarks": landmarks,
+        "connected": sum(length is not None for length in lengths[0]) if lengths else 0,
+        "consistent": len(set(lengths)) <= 1,
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees loading and queries.")
+    parser.add_argument("directory")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated subset of {','.join(MODES)}")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K", help="also time A* with K landmarks")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    for mode in modes:
+        if mode not in MODES:
+            sys.exit(f"Unknown mode {mode}")
+
+    results = benchmark(args.directory, modes, args.queries, args.seed, args.landmarks)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
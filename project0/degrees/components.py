@@ -0,0 +1,143 @@
+"""
+Connected-component labelling of people, so that a query between two
+people in different components is answered without any search.
+
+Components are found with union-find over the stars of every movie.
+For a compact Graph the labels are kept as components.index next to the
+dataset, with the same CSV fingerprint check as the graph snapshot.
+"""
+import os
+from array import array
+
+from snapshot import fingerprint, map_file, write_file
+
+MAGIC = b"DEGCMP01"
+VERSION = 1
+FILENAME = "components.index"
+
+
+class Components():
+    def __init__(self, labels):
+        # Person (index or person_id) -> component label. Each label is a
+        # member of the component it labels, so the labels double as a
+        # union-find parent table for people and stars added later
+        self.labels = labels
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Labels the people of a compact Graph by person index.
+        """
+        parents = array("i", range(len(graph.person_ids)))
+        sizes = array("i", [1]) * len(graph.person_ids)
+        union_stars(parents, sizes, (graph.stars_of(movie) for movie in range(len(graph.movie_ids))))
+        return cls(array("i", (find(parents, person) for person in range(len(parents)))))
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Labels the people of the `people` and `movies` dictionaries by person_id.
+        """
+        parents = {person_id: person_id for person_id in people}
+        sizes = dict.fromkeys(people, 1)
+        union_stars(parents, sizes, (movie["stars"] for movie in movies.values()))
+        return cls({person_id: find(parents, person_id) for person_id in parents})
+
+    def connected(self, person, other):
+        """
+        Returns whether two people are in the same component.
+        """
+        return self.root(person) == self.root(other)
+
+    def root(self, person):
+        """
+        Returns the label of a person's component.
+        """
+        labels = self.labels
+        while labels[person] != person:
+            person = labels[person]
+        return person
+
+    def add_person(self, person):
+        """
+        Adds a person (an index one past the last, or a person_id)
+        as a component of its own.
+        """
+        self.writable()
+        if isinstance(self.labels, dict):
+            self.labels[person] = person
+        else:
+            self.labels.append(person)
+
+    def union(self, person, other):
+        """
+        Merges the components of two people who starred together.
+        """
+        self.writable()
+        root, other_root = self.root(person), self.root(other)
+        if root != other_root:
+            self.labels[other_root] = root
+            # Point both people straight at the new label
+            self.labels[person] = self.labels[other] = root
+
+    def writable(self):
+        """
+        Copies labels mapped from components.index into a writable array.
+        """
+        if isinstance(self.labels, memoryview):
+            self.labels = array("i", self.labels)
+
+
+def find(parents, person):
+    """
+    Returns the root of a person's set, halving the path on the way.
+    """
+    while parents[person] != person:
+        parents[person] = parents[parents[person]]
+        person = parents[person]
+    return person
+
+
+def union_stars(parents, sizes, casts):
+    """
+    Merges the sets of all people who starred in the same movie,
+    attaching the smaller set to the larger one.
+    """
+    for stars in casts:
+        first = None
+        for star in stars:
+            root = find(parents, star)
+            if first is None:
+                first = root
+            elif root != first:
+                if sizes[root] > sizes[first]:
+                    root, first = first, root
+                parents[root] = first
+                sizes[first] += sizes[root]
+
+
+def index_path(directory):
+    """
+    Returns where the component labels of a dataset directory are kept.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def load_index(graph, directory):
+    """
+    Returns the Components of a compact Graph, read from disk if they are
+    still up to date, otherwise computed and written.
+    """
+    sources = fingerprint(directory)
+    path = index_path(directory)
+    mapped = map_file(path, MAGIC, VERSION, sources, ("labels",))
+    if mapped is not None and mapped[0].get("people") == len(graph.person_ids):
+        return Components(mapped[1]["labels"][2])
+
+    components = Components.from_graph(graph)
+    header = {"version": VERSION, "sources": sources, "people": len(graph.person_ids)}
+    try:
+        write_file(path, MAGIC, header, [("labels", "i", len(components.labels), bytes(components.labels))])
+    except OSError:
+        pass
+    return components
@@ -1,143 +1,521 @@
+import argparse
 import csv
+import json
+import os
 import sys
-
-from util import Node, QueueFrontier
-
-# Maps names to a set of corresponding person_ids
+from collections import deque
+from functools import partial
+
+import alternatives
+import components
+import ingest
+import landmarks as landmark_indexes
+import snapshot as snapshots
+from graph import Graph
+from movie_filter import MovieFilter, parse_year
+from name_index import NameIndex
+from stats import NULL_STATS, SearchStats
+
+# Maps names to a set of corresponding person_ids. None after a compact
+# load until get_names builds it from the Graph on the first lookup
 names = {}
 
+# Prefix and fuzzy lookup over `names`, built on the first lookup so that
+# loading a snapshot stays fast for the CLI. The server builds it before
+# serving
+name_index = None
+
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
 people = {}
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-interned Graph, used instead of `people` and `movies`
+# when the data was loaded with compact=True
+graph = None
+
+# LandmarkIndex used for A* search over `graph`, set by
+# load_data(directory, landmarks=k)
+landmark_index = None
+
+# Components of the loaded people, so that people who are not connected
+# are answered without a search. Loaded with a compact Graph, otherwise
+# computed on the first query
+component_index = None
+
+# MovieFilter key -> (filter, set of allowed movie_ids) for filtered
+# searches over `movies`, built on first use
+allowed_movies = {}
 
-def load_data(directory):
+
+def load_data(directory, compact=False, snapshot=False, landmarks=0, stats=None, workers=1):
     """
     Load data from CSV files into memory.
+
+    If `compact` is set, people, movies and stars are loaded into a
+    compact Graph and only the `names` lookup is kept as a dictionary,
+    built on the first lookup by name.
+    If `snapshot` is set, the compact Graph is memory-mapped from the
+    dataset's binary snapshot, which is (re)written when it is missing
+    or older than the CSV files.
+    If `landmarks` is positive, a landmark index with that many landmarks
+    is read from (or built and saved to) the dataset directory and
+    shortest_path runs A* over the compact Graph.
+    A SearchStats passed as `stats` records the load time of each file.
+    With more than one worker the CSV files are parsed in a process pool.
+
+    Any data loaded before is replaced.
+
+    Returns how many people, movies and stars were loaded, and how many
+    star rows were dropped as dangling references to an unknown person
+    or movie.
+    """
+    global names, people, movies, graph, landmark_index, component_index, name_index, allowed_movies
+    stats = stats or NULL_STATS
+    names, people, movies = {}, {}, {}
+    name_index = None
+    component_index = None
+    landmark_index = None
+    allowed_movies = {}
+    if compact or snapshot or landmarks:
+        if snapshot:
+            graph = snapshots.load_graph(directory, stats, workers)
+        else:
+            graph = Graph.from_csv(directory, stats, workers)
+        names = None
+        component_index = components.load_index(graph, directory)
+        if landmarks:
+            landmark_index = landmark_indexes.load_index(graph, directory, landmarks)
+        return {
+            "people": len(graph.person_ids),
+            "movies": len(graph.movie_ids),
+            "stars": len(graph.movie_stars),
+            "dangling": graph.dangling_stars,
+        }
+
+    graph = None
+    counts = {"people": 0, "movies": 0, "stars": 0, "dangling": 0}
+    with ingest.open_tables(directory, workers) as tables:
+        # Load people
+        with stats.timer("load people.csv"):
+            for person_id, name, birth in tables["people.csv"]:
+                people[person_id] = {
+                    "name": name,
+                    "birth": birth,
+                    "movies": set()
+                }
+                if name.lower() not in names:
+                    names[name.lower()] = {person_id}
+                else:
+                    names[name.lower()].add(person_id)
+
+        # Load movies
+        with stats.timer("load movies.csv"):
+            for movie_id, title, year in tables["movies.csv"]:
+                movies[movie_id] = {
+                    "title": title,
+                    "year": year,
+                    "stars": set()
+                }
+
+        # Load stars, counting rows with an unknown person or movie
+        with stats.timer("load stars.csv"):
+            for person_id, movie_id in tables["stars.csv"]:
+                person = people.get(person_id)
+                movie = movies.get(movie_id)
+                if person is None or movie is None:
+                    counts["dangling"] += 1
+                    continue
+                person["movies"].add(movie_id)
+                movie["stars"].add(person_id)
+
+    counts["people"] = len(people)
+    counts["movies"] = len(movies)
+    counts["stars"] = sum(len(movie["stars"]) for movie in movies.values())
+    return counts
+
+
+def apply_updates(directory):
+    """
+    Applies the rows of the people.csv, movies.csv and stars.csv files in
+    `directory` to the already loaded data. Any of the files may be
+    missing. Returns how many people, movies and stars were added, and
+    how many rows were skipped as duplicates or dangling references.
+    """
+    counts = {"people": 0, "movies": 0, "stars": 0, "skipped": 0}
+    updates = (
+        ("people.csv", "people", lambda row: add_person(row["id"], row["name"], row["birth"])),
+        ("movies.csv", "movies", lambda row: add_movie(row["id"], row["title"], row["year"])),
+        ("stars.csv", "stars", lambda row: add_star(row["person_id"], row["movie_id"])),
+    )
+    for filename, count, add in updates:
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if add(row):
+                    counts[count] += 1
+                else:
+                    counts["skipped"] += 1
+    return counts
+
+
+def add_person(person_id, name, birth):
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    Adds a person to the loaded data and updates the name lookups, the
+    component labels and the landmark index in place.
+    Returns False if the person is already known.
+    """
+    if graph is not None:
+        if person_id in graph.person_index:
+            return False
+        person = graph.insert_person(person_id, name, birth)
+    else:
+        if person_id in people:
+            return False
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        person = person_id
+
+    if names is not None:
+        names.setdefault(name.lower(), set()).add(person_id)
+    if name_index is not None:
+        name_index.add(name, person_id)
+    if component_index is not None:
+        component_index.add_person(person)
+    if landmark_index is not None:
+        landmark_index.add_person()
+    return True
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie to the loaded data.
+    Returns False if the movie is already known.
+    """
+    if graph is not None:
+        if movie_id in graph.movie_index:
+            return False
+        graph.insert_movie(movie_id, title, year)
+    else:
+        if movie_id in movies:
+            return False
+        movies[movie_id] = {"title": title, "year": year, "stars": set()}
+        for movie_filter, movie_ids in allowed_movies.values():
+            if movie_filter.allows(parse_year(year)):
+                movie_ids.add(movie_id)
+    return True
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie and updates the component
+    labels and the landmark index in place. Returns False if the person
+    or the movie is unknown or the star is already recorded.
+    """
+    if graph is not None:
+        person = graph.person_index.get(person_id)
+        movie = graph.movie_index.get(movie_id)
+        if person is None or movie is None:
+            return False
+        co_star = next(iter(graph.stars_of(movie)), None)
+        if not graph.insert_star(person, movie):
+            return False
+        if landmark_index is not None:
+            landmark_index.add_star(graph, movie)
+    else:
+        if person_id not in people or movie_id not in movies:
+            return False
+        if movie_id in people[person_id]["movies"]:
+            return False
+        co_star = next(iter(movies[movie_id]["stars"]), None)
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+        person = person_id
+
+    # The stars of a movie already share a component, so joining
+    # any one of them is enough
+    if component_index is not None and co_star is not None:
+        component_index.union(co_star, person)
+    return True
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation between two people.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true", help="load the data into a compact graph")
+    parser.add_argument("--snapshot", action="store_true", help="map the compact graph from a binary snapshot")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K", help="use A* with K landmarks")
+    parser.add_argument("--stats", action="store_true", help="print load and search statistics to stderr")
+    parser.add_argument("--workers", type=int, default=1, help="parse the CSV files in this many processes")
+    parser.add_argument("--updates", action="append", default=[], metavar="DIRECTORY",
+                        help="apply the people, movies and stars rows in DIRECTORY after loading")
+    parser.add_argument("--since", type=int, metavar="YEAR", help="only follow movies released from YEAR")
+    parser.add_argument("--until", type=int, metavar="YEAR", help="only follow movies released until YEAR")
+    parser.add_argument("--decade", type=int, action="append", dest="decades", metavar="DECADE",
+                        help="only follow movies of DECADE, e.g. 1990 (repeatable)")
+    parser.add_argument("--alternatives", type=int, default=0, metavar="K",
+                        help="also print up to K other connections, shortest first")
+    args = parser.parse_args()
+    movie_filter = MovieFilter(args.since, args.until, args.decades)
+    load_stats = SearchStats() if args.stats else None
+    search_stats = SearchStats() if args.stats else None
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    counts = load_data(args.directory, compact=args.compact, snapshot=args.snapshot, landmarks=args.landmarks,
+                       stats=load_stats, workers=args.workers)
+    for updates in args.updates:
+        apply_updates(updates)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found(name))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found(name))
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=not args.landmarks, stats=search_stats,
+                         movie_filter=movie_filter)
+    if args.stats:
+        load = dict(load_stats.as_dict()["timings"], **counts)
+        print(json.dumps({"load": load, "search": search_stats.as_dict()}), file=sys.stderr)
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+    if path is not None and args.alternatives:
+        others = [
+            other for other in k_shortest_paths(source, target, args.alternatives + 1, movie_filter)
+            if other != path
+        ]
+        for other in others[:args.alternatives]:
+            print(f"Or in {len(other)} degrees:")
+            print_path(source, other)
 
 
-def shortest_path(source, target):
+def print_path(source, path):
+    """
+    Prints who starred with whom in which movie along a path.
+    """
+    path = [(None, source)] + path
+    for i in range(len(path) - 1):
+        person1 = person_details(path[i][1])["name"]
+        person2 = person_details(path[i + 1][1])["name"]
+        movie = movie_details(path[i + 1][0])["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def shortest_path(source, target, bidirectional=False, stats=None, movie_filter=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `bidirectional` is set, the search expands from both the source
+    and the target and stops where the two searches meet. Otherwise, if
+    a landmark index is loaded, the search is A* guided by it.
+
+    If a MovieFilter is passed as `movie_filter`, only the movies it
+    allows connect people, e.g. MovieFilter(since=1990).
+
+    A SearchStats passed as `stats` records nodes expanded, the peak
+    frontier size and the time spent generating neighbors and
+    reconstructing the path.
     """
+    stats = stats or NULL_STATS
+    if not connected(source, target):
+        return None
+
+    if graph is not None:
+        if landmark_index is not None and not bidirectional:
+            return landmark_index.shortest_path(graph, source, target, stats, movie_filter)
+        return graph.shortest_path(source, target, bidirectional, stats, movie_filter)
+
+    if bidirectional:
+        return bidirectional_shortest_path(source, target, stats, movie_filter)
+
     goal = target
     start = source
-    explored_states = set()
-    num_explored = 0
+    if start == goal:
+        return []
+
+    # Everyone who was ever added to the frontier -> the person and the
+    # movie one edge back towards the source, kept apart so that reaching
+    # a person allocates no search node
+    parents = {start: None}
+    actions = {}
+    neighbors = stats.neighbors(filtered(new_neighbors, movie_filter))
+    frontier = deque([start])
+
+    while frontier:
+        person_id = frontier.popleft()
+
+        # Add neighbors to frontier, testing for the goal as they are generated
+        for movie_id, neighbor_id in neighbors(person_id, parents):
+            parents[neighbor_id] = person_id
+            actions[neighbor_id] = movie_id
+            if neighbor_id == goal:
+                with stats.timer("path"):
+                    return walk_parents(parents, actions, goal)
+            frontier.append(neighbor_id)
+        stats.frontier(len(frontier))
+
+    return None
+
+
+def walk_parents(parents, actions, person_id):
+    """
+    Follows the parents of a person back to the source and returns the
+    (movie_id, person_id) pairs that lead to it.
+    """
+    path = []
+    while parents[person_id] is not None:
+        path.append((actions[person_id], person_id))
+        person_id = parents[person_id]
+    path.reverse()
+    return path
 
-    start_node = Node(state=start, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start_node)
 
-    while True:
+def all_shortest_paths(source, target, movie_filter=None):
+    """
+    Lazily yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, through the movies allowed
+    by `movie_filter` if given. Yields nothing if there is no path.
+    """
+    if not connected(source, target):
+        return
+    if graph is not None:
+        neighbors = graph.filtered(graph.neighbors, movie_filter)
+        start, goal = graph.person_index[source], graph.person_index[target]
+        for path in alternatives.all_shortest_paths(neighbors, start, goal):
+            yield graph.path_ids(path)
+        return
+    yield from alternatives.all_shortest_paths(all_neighbors(movie_filter), source, target)
+
+
+def k_shortest_paths(source, target, k, movie_filter=None):
+    """
+    Returns up to `k` lists of (movie_id, person_id) pairs that connect
+    the source to the target without visiting anyone twice, shortest
+    first, through the movies allowed by `movie_filter` if given.
+    """
+    if not connected(source, target):
+        return []
+    if graph is not None:
+        neighbors = graph.filtered(graph.neighbors, movie_filter)
+        start, goal = graph.person_index[source], graph.person_index[target]
+        return [graph.path_ids(path) for path in alternatives.k_shortest_paths(neighbors, start, goal, k)]
+    return alternatives.k_shortest_paths(all_neighbors(movie_filter), source, target, k)
 
-        if frontier.empty():
-            return None
 
-        node = frontier.remove()
-        num_explored += 1
+def all_neighbors(movie_filter=None):
+    """
+    Returns a function yielding every (movie_id, person_id) pair of a
+    person in `people`, through the movies allowed by `movie_filter`.
+    """
+    return partial(filtered(new_neighbors, movie_filter), reached=())
 
-        if node.state == goal:
-            actions = []
-            connection = []
-            while node.parent is not None:
-                actions.append(node.action)
-                connection.append(node.state)
-                node = node.parent
-            actions.reverse()
-            connection.reverse()
-            solution = (actions, connection)
-            solution = list(solution)
 
-            solution_edited = []
+def connected(source, target):
+    """
+    Returns True if the source and the target are in the same component.
+    """
+    global component_index
+    if component_index is None:
+        if graph is not None:
+            component_index = components.Components.from_graph(graph)
+        else:
+            component_index = components.Components.from_data(people, movies)
 
-            actions = solution[0]
-            connection = solution[1]
+    if graph is not None:
+        return component_index.connected(graph.person_index[source], graph.person_index[target])
+    return component_index.connected(source, target)
 
-            for i in range(len(actions)):
-                solution_edited.append((actions[i], connection[i]))
 
-            return solution_edited
+def bidirectional_shortest_path(source, target, stats=None, movie_filter=None):
+    """
+    Returns the same kind of path as shortest_path, found by growing
+    one breadth-first search from the source and one from the target.
+    The side with the smaller current layer is always expanded next.
+    Only the movies allowed by `movie_filter` are followed if given.
 
-        # Mark node as explored
-        explored_states.add(node.state)
+    If no possible path, returns None.
+    """
+    stats = stats or NULL_STATS
+    if graph is not None:
+        return graph.shortest_path(source, target, True, stats, movie_filter)
+    if source == target:
+        return []
+
+    # Maps every reached person to the (movie_id, person_id) step
+    # that leads one edge back towards the root of its side
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+    neighbors = stats.neighbors(filtered(new_neighbors, movie_filter))
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward_parents, backward_parents, neighbors)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward_parents, forward_parents, neighbors)
+        stats.frontier(len(forward_layer) + len(backward_layer))
+
+        if meeting is not None:
+            with stats.timer("path"):
+                return join_paths(meeting, forward_parents, backward_parents)
+
+    return None
+
+
+def expand_layer(layer, parents, other_parents, neighbors=None):
+    """
+    Expands every person in `layer` by one edge, recording parents.
+    Returns the next layer and the first person already reached by
+    the other side, or None if the two searches have not met yet.
+    """
+    neighbors = neighbors or new_neighbors
+    next_layer = []
+    for person_id in layer:
+        for movie_id, neighbor_id in neighbors(person_id, parents):
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id in other_parents:
+                return next_layer, neighbor_id
+            next_layer.append(neighbor_id)
+    return next_layer, None
+
+
+def join_paths(meeting, forward_parents, backward_parents):
+    """
+    Joins the source half and the target half of a bidirectional
+    search into one list of (movie_id, person_id) pairs.
+    """
+    path = []
+    person_id = meeting
+    while forward_parents[person_id] is not None:
+        movie_id, previous_id = forward_parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous_id
+    path.reverse()
 
-        # Add neighbors to frontier
-        for action, state in neighbors_for_person(node.state):
-            if not frontier.contains_state(state) and state not in explored_states:
-                child = Node(state, parent=node, action=action)
-                frontier.add(child)
+    person_id = meeting
+    while backward_parents[person_id] is not None:
+        movie_id, next_id = backward_parents[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+
+    return path
 
 
 def person_id_for_name(name):
@@ -145,13 +523,13 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = list(get_names().get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_details(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -166,11 +544,56 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def not_found(name):
+    """
+    Returns the message for a name with no exact match,
+    suggesting the closest names.
+    """
+    suggestions = [person_details(person_id)["name"] for person_id in search_names(name, 3)]
+    if not suggestions:
+        return "Person not found."
+    return f"Person not found. Did you mean: {', '.join(suggestions)}?"
+
+
+def search_names(query, limit=10):
+    """
+    Returns up to `limit` person_ids whose names start with or
+    resemble `query`, best candidates first.
+    """
+    return get_name_index().search(query, limit)
+
+
+def get_name_index():
+    """
+    Returns the NameIndex of the loaded names, building it on first use.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(get_names())
+    return name_index
+
+
+def get_names():
+    """
+    Returns the `names` lookup, building it from the compact Graph on
+    first use.
+    """
+    global names
+    if names is None:
+        names = {}
+        for person_id, name in zip(graph.person_ids, graph.person_names):
+            names.setdefault(name.lower(), set()).add(person_id)
+    return names
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -179,5 +602,62 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def new_neighbors(person_id, reached, allowed=None):
+    """
+    Lazily yields (movie_id, person_id) pairs for people who starred
+    with a given person, movie by movie, skipping anyone in `reached`
+    before a pair is built. The caller adds every yielded person to
+    `reached` before asking for the next one, so nobody is yielded twice.
+    Only the movie_ids in the `allowed` set are followed if it is given,
+    or with a compact Graph the movies set in the `allowed` mask.
+    """
+    if graph is not None:
+        yield from graph.new_neighbors_for_person(person_id, reached, allowed)
+        return
+
+    movie_ids = people[person_id]["movies"]
+    if allowed is not None:
+        movie_ids = filter(allowed.__contains__, movie_ids)
+    for movie_id in movie_ids:
+        for star_id in movies[movie_id]["stars"]:
+            if star_id not in reached:
+                yield movie_id, star_id
+
+
+def filtered(neighbors, movie_filter):
+    """
+    Returns a neighbor function restricted to the movies allowed by
+    `movie_filter`, or `neighbors` itself without a filter. The allowed
+    movies are a set of movie_ids over `movies`, or a mask over the
+    compact Graph.
+    """
+    if movie_filter is None or movie_filter.empty():
+        return neighbors
+    if graph is not None:
+        return graph.filtered(neighbors, movie_filter)
+    cached = allowed_movies.get(movie_filter.key)
+    if cached is None:
+        cached = allowed_movies[movie_filter.key] = (movie_filter, movie_filter.movie_ids(movies))
+    return partial(neighbors, allowed=cached[1])
+
+
+def person_details(person_id):
+    """
+    Returns a dictionary with the name and birth of a person.
+    """
+    if graph is not None:
+        return graph.person_details(person_id)
+    return people[person_id]
+
+
+def movie_details(movie_id):
+    """
+    Returns a dictionary with the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie_details(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
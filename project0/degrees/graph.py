@@ -0,0 +1,523 @@
+from array import array
+from collections import deque
+from functools import partial
+
+from ingest import open_tables
+from movie_filter import decade, parse_year
+from stats import NULL_STATS
+
+
+class Graph():
+    """
+    Compact in-memory graph of people and movies.
+
+    Person and movie IMDB ids are interned to dense integer indexes and
+    adjacency is kept in CSR form: the movies of person `p` are
+    person_movies[person_offsets[p]:person_offsets[p + 1]] and the stars
+    of movie `m` are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+
+    People, movies and stars inserted after the CSR arrays were built are
+    kept in small `added_movies` and `added_stars` overlays instead.
+
+    Movie years are also kept as columns for filtered searches: an int
+    year per movie index and a bitmap per decade, both built on first use.
+    """
+
+    def __init__(self):
+        # Person index -> id, name and birth, and id -> person index
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.person_index = {}
+
+        # Movie index -> id, title and year, and id -> movie index
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+        self.movie_index = {}
+
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Person index -> all its movie indexes, and movie index -> all its
+        # star indexes, for the people and movies changed by insert_star
+        self.added_movies = {}
+        self.added_stars = {}
+
+        # Movie index -> year as an int (0 if unknown), decade -> one byte
+        # per movie index that is 1 for the movies of that decade, and
+        # MovieFilter key -> (filter, its mask), built on first use
+        self.movie_year_column = None
+        self.movie_decade_bitmaps = None
+        self.movie_masks = {}
+
+        # Star rows of the CSV files that referred to an unknown person or movie
+        self.dangling_stars = 0
+
+    @classmethod
+    def from_csv(cls, directory, stats=None, workers=1):
+        """
+        Load a Graph straight from the people, movies and stars CSV files,
+        parsed in a pool of `workers` processes if more than one. Star rows
+        that refer to an unknown person or movie are counted in
+        `dangling_stars` and skipped.
+        """
+        stats = stats or NULL_STATS
+        graph = cls()
+        star_people = array("i")
+        star_movies = array("i")
+        with open_tables(directory, workers) as tables:
+            with stats.timer("load people.csv"):
+                for person_id, name, birth in tables["people.csv"]:
+                    graph.add_person(person_id, name, birth)
+
+            with stats.timer("load movies.csv"):
+                for movie_id, title, year in tables["movies.csv"]:
+                    graph.add_movie(movie_id, title, year)
+
+            with stats.timer("load stars.csv"):
+                person_index, movie_index = graph.person_index, graph.movie_index
+                for person_id, movie_id in tables["stars.csv"]:
+                    person = person_index.get(person_id)
+                    movie = movie_index.get(movie_id)
+                    if person is None or movie is None:
+                        graph.dangling_stars += 1
+                        continue
+                    star_people.append(person)
+                    star_movies.append(movie)
+
+        with stats.timer("build graph"):
+            graph.build(star_people, star_movies)
+        return graph
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Build a Graph from the `people` and `movies` dictionaries
+        filled by degrees.load_data.
+        """
+        graph = cls()
+        for person_id, person in people.items():
+            graph.add_person(person_id, person["name"], person["birth"])
+        for movie_id, movie in movies.items():
+            graph.add_movie(movie_id, movie["title"], movie["year"])
+
+        star_people = array("i")
+        star_movies = array("i")
+        for movie_id, movie in movies.items():
+            for person_id in movie["stars"]:
+                star_people.append(graph.person_index[person_id])
+                star_movies.append(graph.movie_index[movie_id])
+
+        graph.build(star_people, star_movies)
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person and returns its index.
+        """
+        index = self.person_index.get(person_id)
+        if index is None:
+            index = len(self.person_ids)
+            self.person_index[person_id] = index
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(birth)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie and returns its index.
+        """
+        index = self.movie_index.get(movie_id)
+        if index is None:
+            index = len(self.movie_ids)
+            self.movie_index[movie_id] = index
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+        return index
+
+    def build(self, star_people, star_movies):
+        """
+        Builds both CSR adjacency arrays from parallel arrays of
+        (person index, movie index) star pairs.
+        """
+        self.person_offsets, self.person_movies = csr(len(self.person_ids), star_people, star_movies)
+        self.movie_offsets, self.movie_stars = csr(len(self.movie_ids), star_movies, star_people)
+        self.added_movies = {}
+        self.added_stars = {}
+
+    def insert_person(self, person_id, name, birth):
+        """
+        Adds a person after the graph was built and returns its index.
+        """
+        index = self.add_person(person_id, name, birth)
+        if index >= len(self.person_offsets) - 1:
+            self.added_movies.setdefault(index, [])
+        return index
+
+    def insert_movie(self, movie_id, title, year):
+        """
+        Adds a movie after the graph was built and returns its index.
+        """
+        count = len(self.movie_ids)
+        index = self.add_movie(movie_id, title, year)
+        if index >= len(self.movie_offsets) - 1:
+            self.added_stars.setdefault(index, [])
+        if index == count:
+            self.extend_columns(parse_year(year))
+        return index
+
+    def year_column(self):
+        """
+        Returns the year of every movie index as an array of ints.
+        """
+        if self.movie_year_column is None:
+            self.movie_year_column = array("h", map(parse_year, self.movie_years))
+        return self.movie_year_column
+
+    def decade_bitmaps(self):
+        """
+        Returns a dictionary mapping every decade with a movie to a
+        bytearray with one byte per movie index, 1 for its movies.
+        """
+        if self.movie_decade_bitmaps is None:
+            years = self.year_column()
+            bitmaps = {}
+            for movie, year in enumerate(years):
+                if year:
+                    bitmap = bitmaps.get(decade(year))
+                    if bitmap is None:
+                        bitmap = bitmaps[decade(year)] = bytearray(len(years))
+                    bitmap[movie] = 1
+            self.movie_decade_bitmaps = bitmaps
+        return self.movie_decade_bitmaps
+
+    def extend_columns(self, year):
+        """
+        Appends a movie inserted after the year columns and masks were
+        built to each of them.
+        """
+        if self.movie_year_column is not None:
+            self.movie_year_column.append(year)
+        if self.movie_decade_bitmaps is not None:
+            for bitmap in self.movie_decade_bitmaps.values():
+                bitmap.append(0)
+            if year:
+                bitmap = self.movie_decade_bitmaps.get(decade(year))
+                if bitmap is None:
+                    bitmap = self.movie_decade_bitmaps[decade(year)] = bytearray(len(self.movie_ids))
+                bitmap[-1] = 1
+        for movie_filter, mask in self.movie_masks.values():
+            mask.append(movie_filter.allows(year))
+
+    def insert_star(self, person, movie):
+        """
+        Adds a (person index, movie index) star after the graph was built.
+        Returns False if the person already starred in the movie.
+        """
+        movies = self.added_movies.get(person)
+        if movies is None:
+            movies = self.added_movies[person] = list(self.movies_of(person))
+        if movie in movies:
+            return False
+        movies.append(movie)
+
+        stars = self.added_stars.get(movie)
+        if stars is None:
+            stars = self.added_stars[movie] = list(self.stars_of(movie))
+        stars.append(person)
+        return True
+
+    def movies_of(self, person):
+        """
+        Returns the indexes of the movies a person starred in.
+        """
+        if person in self.added_movies:
+            return self.added_movies[person]
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the indexes of the people who starred in a movie.
+        """
+        if movie in self.added_stars:
+            return self.added_stars[movie]
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person, allowed=None):
+        """
+        Yields (movie index, person index) pairs for people who starred
+        with a given person, only through the movies set in the `allowed`
+        mask if given.
+        """
+        movies = self.movies_of(person)
+        if allowed is not None:
+            movies = filter(allowed.__getitem__, movies)
+        for movie in movies:
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def new_neighbors(self, person, reached, allowed=None):
+        """
+        Lazily yields (movie index, person index) pairs for co-stars whose
+        flag in the `reached` bytearray is still unset, movie by movie.
+        The caller sets the flag of every yielded person before asking for
+        the next one, so nobody is yielded twice. Only the movies set in
+        the `allowed` mask are followed if it is given.
+        """
+        movies = self.movies_of(person)
+        if allowed is not None:
+            movies = filter(allowed.__getitem__, movies)
+        for movie in movies:
+            for star in self.stars_of(movie):
+                if not reached[star]:
+                    yield movie, star
+
+    def new_neighbors_for_person(self, person_id, reached, allowed=None):
+        """
+        Like new_neighbors, with person_ids and a set or dictionary of
+        reached person_ids.
+        """
+        person_ids = self.person_ids
+        movies = self.movies_of(self.person_index[person_id])
+        if allowed is not None:
+            movies = filter(allowed.__getitem__, movies)
+        for movie in movies:
+            for star in self.stars_of(movie):
+                if person_ids[star] not in reached:
+                    yield self.movie_ids[movie], person_ids[star]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(self.person_index[person_id])
+        }
+
+    def person_details(self, person_id):
+        """
+        Returns the name and birth of a person as a dictionary.
+        """
+        index = self.person_index[person_id]
+        return {"name": self.person_names[index], "birth": self.person_births[index]}
+
+    def movie_details(self, movie_id):
+        """
+        Returns the title and year of a movie as a dictionary.
+        """
+        index = self.movie_index[movie_id]
+        return {"title": self.movie_titles[index], "year": self.movie_years[index]}
+
+    def shortest_path(self, source, target, bidirectional=False, stats=None, movie_filter=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, only through the movies
+        allowed by `movie_filter` if given.
+
+        If no possible path, returns None.
+        """
+        stats = stats or NULL_STATS
+        start = self.person_index[source]
+        goal = self.person_index[target]
+        if bidirectional:
+            return self.bidirectional_path(start, goal, stats, movie_filter)
+
+        if start == goal:
+            return []
+
+        neighbors = stats.neighbors(self.filtered(self.new_neighbors, movie_filter))
+        reached = bytearray(len(self.person_ids))
+        reached[start] = 1
+        parents, actions = self.parent_arrays()
+        frontier = deque([start])
+        while frontier:
+            previous = frontier.popleft()
+            for movie, person in neighbors(previous, reached):
+                reached[person] = 1
+                parents[person] = previous
+                actions[person] = movie
+                if person == goal:
+                    with stats.timer("path"):
+                        return self.walk_parents(parents, actions, start, goal)
+                frontier.append(person)
+            stats.frontier(len(frontier))
+        return None
+
+    def paths_from(self, source, targets, stats=None):
+        """
+        Returns a dictionary mapping every target person_id to its shortest
+        path from the source (or None if not connected), found with a single
+        breadth-first search that stops once all targets are reached.
+        """
+        stats = stats or NULL_STATS
+        neighbors = stats.neighbors(self.new_neighbors)
+        start = self.person_index[source]
+        goals = {self.person_index[target]: target for target in targets}
+        found = 1 if start in goals else 0
+
+        reached = bytearray(len(self.person_ids))
+        reached[start] = 1
+        parents, actions = self.parent_arrays()
+        frontier = deque([start])
+        while frontier and found < len(goals):
+            previous = frontier.popleft()
+            for movie, person in neighbors(previous, reached):
+                reached[person] = 1
+                parents[person] = previous
+                actions[person] = movie
+                if person in goals:
+                    found += 1
+                frontier.append(person)
+            stats.frontier(len(frontier))
+
+        with stats.timer("path"):
+            return {
+                target: self.walk_parents(parents, actions, start, goal) if reached[goal] else None
+                for goal, target in goals.items()
+            }
+
+    def parent_arrays(self):
+        """
+        Returns two arrays indexed by person: the person and the movie one
+        edge back towards the root of a search. Only the entries of
+        reached people are ever read, so they start out as zeros.
+        """
+        zeros = array("i", [0]) * len(self.person_ids)
+        return zeros, array("i", zeros)
+
+    def walk_parents(self, parents, actions, start, person):
+        """
+        Follows the parent arrays of a search from a person back to its
+        start and returns the (movie_id, person_id) pairs that lead there.
+        """
+        path = []
+        while person != start:
+            path.append((self.movie_ids[actions[person]], self.person_ids[person]))
+            person = parents[person]
+        path.reverse()
+        return path
+
+    def path_to(self, node):
+        """
+        Walks a search node back to the root and returns the
+        (movie_id, person_id) pairs that lead to it.
+        """
+        path = []
+        while node.parent is not None:
+            path.append((self.movie_ids[node.action], self.person_ids[node.state]))
+            node = node.parent
+        path.reverse()
+        return path
+
+    def path_ids(self, path):
+        """
+        Turns a list of (movie index, person index) pairs into
+        (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def filtered(self, neighbors, movie_filter):
+        """
+        Returns a neighbor function restricted to the movies allowed by
+        `movie_filter`, or `neighbors` itself without a filter.
+        """
+        if movie_filter is None or movie_filter.empty():
+            return neighbors
+        return partial(neighbors, allowed=movie_filter.mask(self))
+
+    def bidirectional_path(self, start, goal, stats=None, movie_filter=None):
+        """
+        Bidirectional breadth-first search between two person indexes,
+        always expanding the side with the smaller current layer.
+        """
+        stats = stats or NULL_STATS
+        if start == goal:
+            return []
+
+        # Person index -> (movie index, person index) one edge back
+        # towards the root of that side
+        forward_parents = {start: None}
+        backward_parents = {goal: None}
+        forward_reached = bytearray(len(self.person_ids))
+        backward_reached = bytearray(len(self.person_ids))
+        forward_reached[start] = backward_reached[goal] = 1
+        forward_layer = [start]
+        backward_layer = [goal]
+        neighbors = stats.neighbors(self.filtered(self.new_neighbors, movie_filter))
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = expand_layer(
+                    forward_layer, forward_parents, forward_reached, backward_reached, neighbors)
+            else:
+                backward_layer, meeting = expand_layer(
+                    backward_layer, backward_parents, backward_reached, forward_reached, neighbors)
+            stats.frontier(len(forward_layer) + len(backward_layer))
+
+            if meeting is not None:
+                with stats.timer("path"):
+                    return self.join_paths(meeting, forward_parents, backward_parents)
+
+        return None
+
+    def join_paths(self, meeting, forward_parents, backward_parents):
+        """
+        Joins both halves of a bidirectional search into (movie_id, person_id) pairs.
+        """
+        path = []
+        person = meeting
+        while forward_parents[person] is not None:
+            movie, previous = forward_parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = previous
+        path.reverse()
+
+        person = meeting
+        while backward_parents[person] is not None:
+            movie, following = backward_parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[following]))
+            person = following
+
+        return path
+
+
+def expand_layer(layer, parents, reached, other_reached, neighbors):
+    """
+    Expands a layer by one edge. Returns the next layer and the first
+    person already reached by the other side, or None.
+    """
+    next_layer = []
+    for person in layer:
+        for movie, neighbor in neighbors(person, reached):
+            reached[neighbor] = 1
+            parents[neighbor] = (movie, person)
+            if other_reached[neighbor]:
+                return next_layer, neighbor
+            next_layer.append(neighbor)
+    return next_layer, None
+
+
+def csr(num_rows, rows, cols):
+    """
+    Groups `cols` by `rows` with a counting sort and returns the
+    (offsets, values) arrays of the resulting CSR matrix.
+    """
+    offsets = array("i", [0]) * (num_rows + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+
+    position = offsets[:-1]
+    values = array("i", [0]) * len(rows)
+    for row, col in zip(rows, cols):
+        values[position[row]] = col
+        position[row] += 1
+    return offsets, values
@@ -0,0 +1,94 @@
+"""
+Streaming, parallel parsing of the people, movies and stars CSV files.
+
+Each file is read in chunks of whole CSV records and every chunk is
+parsed with csv.reader into tuples of just the columns that are needed,
+picked by their index in the header. With more than one worker the
+chunks of all three files are handed to one process pool at once, so
+people and movies (and stars) are parsed concurrently while the caller
+merges the rows in file order.
+"""
+import csv
+import itertools
+import multiprocessing
+from contextlib import contextmanager
+from operator import itemgetter
+
+# Columns read from each file, in the order of the row tuples
+COLUMNS = {
+    "people.csv": ("id", "name", "birth"),
+    "movies.csv": ("id", "title", "year"),
+    "stars.csv": ("person_id", "movie_id"),
+}
+
+# Lines per chunk handed to a worker
+CHUNK_LINES = 20000
+
+
+@contextmanager
+def open_tables(directory, workers=1, chunk_lines=CHUNK_LINES):
+    """
+    Yields a dictionary mapping each of people.csv, movies.csv and
+    stars.csv to an iterator over its rows as tuples of its COLUMNS.
+    With more than one worker the files are parsed in a process pool,
+    which is shut down when the `with` block ends.
+    """
+    paths = {name: f"{directory}/{name}" for name in COLUMNS}
+    if workers <= 1:
+        yield {name: rows(path, COLUMNS[name]) for name, path in paths.items()}
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield {
+            name: itertools.chain.from_iterable(pool.imap(parse_chunk, chunks(path, COLUMNS[name], chunk_lines)))
+            for name, path in paths.items()
+        }
+
+
+def rows(path, columns):
+    """
+    Yields the rows of a CSV file as tuples of the given columns.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        pick = itemgetter(*column_indexes(next(reader), columns))
+        for row in reader:
+            if row:
+                yield pick(row)
+
+
+def chunks(path, columns, chunk_lines=CHUNK_LINES):
+    """
+    Yields (lines, column indexes) chunks of a CSV file. A chunk only
+    ends after a line with an even number of quotes in total, so no record
+    quoted across lines is split between two chunks.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        indexes = column_indexes(next(csv.reader([f.readline()])), columns)
+        lines = []
+        quotes = 0
+        for line in f:
+            lines.append(line)
+            quotes += line.count('"')
+            if len(lines) >= chunk_lines and quotes % 2 == 0:
+                yield lines, indexes
+                lines = []
+                quotes = 0
+        if lines:
+            yield lines, indexes
+
+
+def parse_chunk(chunk):
+    """
+    Parses the lines of a chunk into tuples of the chosen columns.
+    """
+    lines, indexes = chunk
+    pick = itemgetter(*indexes)
+    return [pick(row) for row in csv.reader(lines) if row]
+
+
+def column_indexes(header, columns):
+    """
+    Returns the index of every column in a header row.
+    """
+    return tuple(header.index(column) for column in columns)
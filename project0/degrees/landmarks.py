@@ -0,0 +1,218 @@
+"""
+Landmark (ALT) distance index for A* search over a compact Graph.
+
+A few high-degree people are picked as landmarks and their breadth-first
+distance to every person is stored. By the triangle inequality,
+|d(L, target) - d(L, person)| never overestimates d(person, target),
+which makes it an admissible and consistent A* heuristic.
+
+The index is persisted as landmarks.index next to the dataset, with the
+same CSV fingerprint check as the graph snapshot.
+"""
+import os
+from array import array
+from collections import deque
+
+from snapshot import fingerprint, map_file, write_file
+from stats import NULL_STATS
+from util import Node, PriorityFrontier
+
+MAGIC = b"DEGLMK01"
+VERSION = 1
+FILENAME = "landmarks.index"
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, distances):
+        # Person indexes of the landmarks and, for each landmark,
+        # its distance to every person (UNREACHABLE if not connected)
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k):
+        """
+        Picks the `k` people with the most co-star slots as landmarks
+        and runs a breadth-first search from each of them.
+        """
+        degree = [0] * len(graph.person_ids)
+        for person in range(len(graph.person_ids)):
+            for movie in graph.movies_of(person):
+                degree[person] += len(graph.stars_of(movie))
+        landmarks = sorted(range(len(degree)), key=lambda person: -degree[person])[:k]
+        return cls(landmarks, [distances_from(graph, landmark) for landmark in landmarks])
+
+    def estimate(self, person, goal):
+        """
+        Returns a lower bound on the distance between two person indexes,
+        or None if some landmark proves they are not connected.
+        """
+        best = 0
+        for distances in self.distances:
+            to_person = distances[person]
+            to_goal = distances[goal]
+            if (to_person == UNREACHABLE) != (to_goal == UNREACHABLE):
+                return None
+            if to_person != UNREACHABLE and abs(to_goal - to_person) > best:
+                best = abs(to_goal - to_person)
+        return best
+
+    def shortest_path(self, graph, source, target, stats=None, movie_filter=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, found with A*. With a
+        `movie_filter` the estimates stay admissible, since removing
+        movies never makes a path shorter.
+
+        If no possible path, returns None.
+        """
+        stats = stats or NULL_STATS
+        neighbors = stats.neighbors(graph.filtered(graph.neighbors, movie_filter))
+        start = graph.person_index[source]
+        goal = graph.person_index[target]
+        if start == goal:
+            return []
+        estimate = self.estimate(start, goal)
+        if estimate is None:
+            return None
+
+        costs = {start: 0}
+        explored = bytearray(len(graph.person_ids))
+        frontier = PriorityFrontier()
+        frontier.add(Node(start, None, None), estimate)
+
+        while not frontier.empty():
+            node = frontier.remove()
+            if explored[node.state]:
+                continue
+            if node.state == goal:
+                with stats.timer("path"):
+                    return graph.path_to(node)
+            explored[node.state] = 1
+
+            cost = costs[node.state] + 1
+            for movie, person in neighbors(node.state):
+                if explored[person] or costs.get(person, cost + 1) <= cost:
+                    continue
+                estimate = self.estimate(person, goal)
+                if estimate is None:
+                    continue
+                costs[person] = cost
+                frontier.add(Node(person, node, movie), cost + estimate)
+            stats.frontier(len(frontier.frontier))
+
+        return None
+
+    def add_person(self):
+        """
+        Extends every distance array for a person appended to the graph.
+        """
+        for i, distances in enumerate(self.distances):
+            if isinstance(distances, memoryview):
+                distances = self.distances[i] = array("i", distances)
+            distances.append(UNREACHABLE)
+
+    def add_star(self, graph, movie):
+        """
+        Updates the distances after a star was added to a movie. Adding an
+        edge can only shorten distances, so the stars of the movie that got
+        closer to a landmark are re-propagated breadth-first from there.
+        """
+        stars = graph.stars_of(movie)
+        for i, distances in enumerate(self.distances):
+            reachable = [distances[star] for star in stars if distances[star] != UNREACHABLE]
+            if not reachable:
+                continue
+            if isinstance(distances, memoryview):
+                distances = self.distances[i] = array("i", distances)
+
+            distance = min(reachable) + 1
+            frontier = deque()
+            for star in stars:
+                if distances[star] == UNREACHABLE or distances[star] > distance:
+                    distances[star] = distance
+                    frontier.append(star)
+            relax(graph, distances, frontier)
+
+
+def relax(graph, distances, frontier):
+    """
+    Continues a breadth-first search from `frontier`, lowering every
+    distance that can be reached in fewer steps.
+    """
+    while frontier:
+        person = frontier.popleft()
+        distance = distances[person] + 1
+        for movie, neighbor in graph.neighbors(person):
+            if distances[neighbor] == UNREACHABLE or distances[neighbor] > distance:
+                distances[neighbor] = distance
+                frontier.append(neighbor)
+
+
+def distances_from(graph, source):
+    """
+    Returns the breadth-first distance from a person index to every person.
+    """
+    distances = array("i", [UNREACHABLE]) * len(graph.person_ids)
+    distances[source] = 0
+    relax(graph, distances, deque([source]))
+    return distances
+
+
+def index_path(directory):
+    """
+    Returns where the landmark index of a dataset directory is kept.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def load_index(graph, directory, k):
+    """
+    Returns the landmark index of a dataset, read from disk if it is still
+    up to date and has `k` landmarks, otherwise built and written.
+    """
+    sources = fingerprint(directory)
+    path = index_path(directory)
+    index = read_index(path, sources, len(graph.person_ids))
+    if index is None or len(index.landmarks) != min(k, len(graph.person_ids)):
+        index = LandmarkIndex.build(graph, k)
+        try:
+            write_index(index, path, sources)
+        except OSError:
+            pass
+    return index
+
+
+def write_index(index, path, sources):
+    """
+    Writes a landmark index to `path`, replacing any previous one atomically.
+    """
+    header = {
+        "version": VERSION,
+        "sources": sources,
+        "people": len(index.distances[0]) if index.distances else 0,
+        "landmarks": index.landmarks,
+    }
+    blobs = [
+        (f"distances{i}", "i", len(distances), bytes(distances))
+        for i, distances in enumerate(index.distances)
+    ]
+    write_file(path, MAGIC, header, blobs)
+
+
+def read_index(path, sources, people):
+    """
+    Maps a landmark index. Returns None if there is none, it cannot be
+    read, or it was built from different CSV files.
+    """
+    mapped = map_file(path, MAGIC, VERSION, sources)
+    if mapped is None or mapped[0].get("people") != people:
+        return None
+
+    header, sections = mapped
+    names = [f"distances{i}" for i in range(len(header.get("landmarks", ())))]
+    if not names or any(name not in sections for name in names):
+        return None
+    distances = [sections[name][2] for name in names]
+    return LandmarkIndex(header["landmarks"], distances)
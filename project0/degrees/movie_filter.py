@@ -0,0 +1,117 @@
+"""
+Restricting searches to a subset of movies, such as "movies released
+after 1990 only", without copying or filtering the loaded data.
+
+A MovieFilter is resolved once per Graph into a mask with one byte per
+movie index, from the Graph's year column and per-decade bitmaps, and
+the mask is cached on the Graph. The searches then skip a movie with a
+single mask lookup per edge. For the `people` and `movies` dictionaries
+the filter is resolved into the set of allowed movie_ids instead.
+"""
+
+
+class MovieFilter():
+    def __init__(self, since=None, until=None, decades=None):
+        """
+        Allows the movies released from `since` to `until` (both
+        inclusive, either may be None) whose decade, e.g. 1990, is one of
+        `decades` if given. Movies without a known year are only allowed
+        by the empty filter.
+        """
+        self.since = since
+        self.until = until
+        self.decades = None if decades is None else frozenset(decades)
+        self.key = (since, until, self.decades)
+
+    def __eq__(self, other):
+        return isinstance(other, MovieFilter) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"MovieFilter(since={self.since}, until={self.until}, decades={self.decades})"
+
+    def empty(self):
+        """
+        Returns whether the filter allows every movie.
+        """
+        return self.since is None and self.until is None and self.decades is None
+
+    def allows(self, year):
+        """
+        Returns whether a movie released in `year` (an int, 0 if unknown)
+        is allowed.
+        """
+        if self.empty():
+            return True
+        if not year:
+            return False
+        if self.since is not None and year < self.since:
+            return False
+        if self.until is not None and year > self.until:
+            return False
+        return self.decades is None or decade(year) in self.decades
+
+    def mask(self, graph):
+        """
+        Returns the cached mask of a Graph, one byte per movie index that
+        is 1 for every allowed movie.
+        """
+        cached = graph.movie_masks.get(self.key)
+        if cached is None:
+            cached = graph.movie_masks[self.key] = (self, self.build_mask(graph))
+        return cached[1]
+
+    def build_mask(self, graph):
+        """
+        Combines the decade bitmaps of a Graph and, if the filter has
+        year bounds, a pass over its year column into one mask.
+        """
+        years = graph.year_column()
+        bitmaps = graph.decade_bitmaps()
+        mask = None
+        if self.decades is not None:
+            mask = bytearray(len(years))
+            for selected in self.decades & bitmaps.keys():
+                mask = combine(mask, bitmaps[selected], int.__or__)
+
+        if self.since is not None or self.until is not None:
+            since = self.since if self.since is not None else 1
+            until = self.until if self.until is not None else 9999
+            bounds = bytearray(since <= year <= until for year in years)
+            mask = bounds if mask is None else combine(mask, bounds, int.__and__)
+
+        return bytearray(b"\1") * len(years) if mask is None else mask
+
+    def movie_ids(self, movies):
+        """
+        Returns the set of allowed movie_ids of the `movies` dictionary.
+        """
+        return {movie_id for movie_id, movie in movies.items() if self.allows(parse_year(movie["year"]))}
+
+
+def combine(mask, other, operator):
+    """
+    Combines two masks of the same length byte by byte with a bitwise
+    int operator, at the speed of one big-integer operation.
+    """
+    value = operator(int.from_bytes(mask, "little"), int.from_bytes(other, "little"))
+    return bytearray(value.to_bytes(len(mask), "little"))
+
+
+def decade(year):
+    """
+    Returns the decade of a year, e.g. 1990 for 1994.
+    """
+    return year - year % 10
+
+
+def parse_year(year):
+    """
+    Returns a year from the movies CSV as an int, or 0 if it is unknown.
+    """
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return 0
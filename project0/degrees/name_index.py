@@ -0,0 +1,156 @@
+"""
+Prefix and fuzzy lookup of people by name, for autocomplete.
+
+Lowercase names are kept in a sorted list, so every name with a given
+prefix is found with one binary search. Misspelled names are ranked by
+trigram (Jaccard) similarity among a bounded set of candidates: the
+names next to the query in alphabetical order, which share its longest
+prefix, the names next to it in the order of their reversed spelling,
+which share its longest suffix, and the names holding its rarest
+trigrams. A misspelling leaves either a long prefix or a long suffix
+intact, and the cost of a query does not grow with the number of names.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+
+# Names on either side of a query, in alphabetical and in reversed
+# spelling order, that a fuzzy query ranks
+NEIGHBORS = 32
+
+# Most names holding the rarest trigrams of a query that it ranks
+MAX_POSTINGS = 128
+
+
+class NameIndex():
+    def __init__(self, names):
+        """
+        Builds the index from a dictionary mapping lowercase names to
+        sets of person_ids, like degrees.names.
+        """
+        # Entry -> lowercase name, its person_ids and its trigram count
+        self.names = []
+        self.person_ids = []
+        self.sizes = array("i")
+
+        # Trigram -> entries of the names containing it
+        self.trigrams = {}
+
+        # Lowercase names in sorted order, and the entry of each
+        self.sorted_names = sorted(names)
+        self.sorted_entries = array("i", range(len(self.sorted_names)))
+
+        for key in self.sorted_names:
+            self.add_entry(key, sorted(names[key]))
+
+        # Reversed lowercase names in sorted order, and the entry of each
+        reversed_names = sorted((key[::-1], entry) for entry, key in enumerate(self.sorted_names))
+        self.reversed_names = [key for key, _ in reversed_names]
+        self.reversed_entries = array("i", (entry for _, entry in reversed_names))
+
+    def add_entry(self, key, person_ids):
+        """
+        Appends an entry for a lowercase name and indexes its trigrams.
+        """
+        entry = len(self.names)
+        grams = trigrams(key)
+        self.names.append(key)
+        self.person_ids.append(person_ids)
+        self.sizes.append(len(grams))
+        for gram in grams:
+            postings = self.trigrams.get(gram)
+            if postings is None:
+                postings = self.trigrams[gram] = array("i")
+            postings.append(entry)
+        return entry
+
+    def add(self, name, person_id):
+        """
+        Adds one person to the index without rebuilding it.
+        """
+        key = name.lower()
+        position = bisect_left(self.sorted_names, key)
+        if position < len(self.sorted_names) and self.sorted_names[position] == key:
+            person_ids = self.person_ids[self.sorted_entries[position]]
+            if person_id not in person_ids:
+                person_ids.append(person_id)
+                person_ids.sort()
+            return
+
+        entry = self.add_entry(key, [person_id])
+        self.sorted_names.insert(position, key)
+        self.sorted_entries.insert(position, entry)
+        position = bisect_left(self.reversed_names, key[::-1])
+        self.reversed_names.insert(position, key[::-1])
+        self.reversed_entries.insert(position, entry)
+
+    def prefix(self, query, limit=10):
+        """
+        Returns up to `limit` person_ids whose name starts with `query`,
+        in alphabetical order of name.
+        """
+        query = query.lower()
+        results = []
+        position = bisect_left(self.sorted_names, query)
+        while position < len(self.sorted_names) and len(results) < limit:
+            if not self.sorted_names[position].startswith(query):
+                break
+            results.extend(self.person_ids[self.sorted_entries[position]])
+            position += 1
+        return results[:limit]
+
+    def fuzzy(self, query, limit=10):
+        """
+        Returns up to `limit` person_ids whose name shares the most
+        trigrams with `query`, best match first, among the candidates of
+        the query.
+        """
+        key = query.lower()
+        grams = trigrams(key)
+        candidates = set()
+        for sorted_names, entries, probe in ((self.sorted_names, self.sorted_entries, key),
+                                             (self.reversed_names, self.reversed_entries, key[::-1])):
+            position = bisect_left(sorted_names, probe)
+            candidates.update(entries[max(0, position - NEIGHBORS):position + NEIGHBORS])
+        postings = 0
+        for gram in sorted(grams, key=lambda gram: len(self.trigrams.get(gram, ()))):
+            entries = self.trigrams.get(gram, ())
+            postings += len(entries)
+            if postings > MAX_POSTINGS:
+                break
+            candidates.update(entries)
+
+        scored = []
+        for entry in candidates:
+            padded = f"  {self.names[entry]} "
+            shared = sum(gram in padded for gram in grams)
+            if shared:
+                scored.append((-shared / (len(grams) + self.sizes[entry] - shared), self.names[entry], entry))
+
+        # Every entry holds at least one person, so `limit` entries are enough
+        results = []
+        for _, _, entry in heapq.nsmallest(limit, scored):
+            results.extend(self.person_ids[entry])
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` candidate person_ids for a partial or
+        misspelled name: prefix matches first, then fuzzy matches.
+        """
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            for person_id in self.fuzzy(query, limit):
+                if person_id not in results:
+                    results.append(person_id)
+        return results[:limit]
+
+
+def trigrams(text):
+    """
+    Returns the set of 3-character substrings of a padded string.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,241 @@
+"""
+Resident degrees query server.
+
+Keeps the graph loaded and answers HTTP requests such as
+
+    GET /shortest_path?source=102&target=158
+
+with a JSON body {"source", "target", "degrees", "path"}, and name
+autocomplete requests such as GET /search_names?query=kev&limit=10. Searches run in
+a pool of forked worker processes that share the loaded graph, and
+results are kept in a bounded LRU cache keyed by the unordered pair, so
+a reversed query is served from the same entry.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths. Each entry holds the path from
+    the smaller person_id of the pair to the larger one.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(source, target):
+        return (source, target) if source <= target else (target, source)
+
+    def get(self, source, target):
+        """
+        Returns (True, path) oriented from source to target on a hit,
+        or (False, None) on a miss.
+        """
+        key = self.key(source, target)
+        if key not in self.entries:
+            return False, None
+        self.entries.move_to_end(key)
+        return True, orient(key[0], self.entries[key], source)
+
+    def put(self, source, target, path):
+        key = self.key(source, target)
+        self.entries[key] = orient(source, path, key[0])
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the last person of `path` back to `source`.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
+
+
+def orient(start, path, source):
+    """
+    Returns a path that begins at `start`, reversed to begin at `source`.
+    """
+    if path is None or start == source:
+        return path
+    return reverse_path(start, path)
+
+
+def search(source, target):
+    """
+    Runs in a worker process, over the graph inherited from the server.
+    Without a landmark index the search is bidirectional, as in the CLI.
+    """
+    return degrees.shortest_path(source, target, bidirectional=degrees.landmark_index is None)
+
+
+class Server():
+    def __init__(self, executor, cache_size):
+        self.executor = executor
+        self.cache = PathCache(cache_size)
+        # Searches in flight, so concurrent requests for a pair share one
+        self.pending = {}
+
+    async def shortest_path(self, source, target):
+        """
+        Returns the path between two people from the cache, from a search
+        already in flight for the same pair, or from a new search.
+        """
+        hit, path = self.cache.get(source, target)
+        if hit:
+            return path
+
+        key = PathCache.key(source, target)
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.search(*key))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        return orient(key[0], await task, source)
+
+    async def search(self, source, target):
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(self.executor, search, source, target)
+        self.cache.put(source, target, path)
+        return path
+
+    async def handle(self, reader, writer):
+        """
+        Answers one HTTP request per connection.
+        """
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            status, body = await self.respond(request_line.decode("latin-1"))
+        except Exception as e:
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+        writer.close()
+
+    async def respond(self, request_line):
+        """
+        Returns the status and JSON body for a request line.
+        """
+        parts = request_line.split()
+        if len(parts) != 3 or parts[0] != "GET":
+            return HTTPStatus.BAD_REQUEST, {"error": "expected a GET request"}
+
+        url = urlsplit(parts[1])
+        query = parse_qs(url.query)
+        if url.path == "/search_names":
+            return self.search_names(query)
+        if url.path != "/shortest_path":
+            return HTTPStatus.NOT_FOUND, {"error": f"no such endpoint {url.path}"}
+
+        source = query.get("source", [None])[0]
+        target = query.get("target", [None])[0]
+        if source is None or target is None:
+            return HTTPStatus.BAD_REQUEST, {"error": "source and target are required"}
+        for person_id in (source, target):
+            if not known_person(person_id):
+                return HTTPStatus.NOT_FOUND, {"error": f"unknown person {person_id}"}
+
+        path = await self.shortest_path(source, target)
+        return HTTPStatus.OK, {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+        }
+
+    def search_names(self, query):
+        """
+        Returns autocomplete candidates for a partial or misspelled name.
+        """
+        text = query.get("query", [""])[0]
+        try:
+            limit = int(query.get("limit", ["10"])[0])
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "limit must be an integer"}
+
+        candidates = []
+        for person_id in degrees.search_names(text, limit):
+            person = degrees.person_details(person_id)
+            candidates.append({"id": person_id, "name": person["name"], "birth": person["birth"]})
+        return HTTPStatus.OK, {"query": text, "candidates": candidates}
+
+
+def known_person(person_id):
+    """
+    Returns True if the person_id is in the loaded data.
+    """
+    if degrees.graph is not None:
+        return person_id in degrees.graph.person_index
+    return person_id in degrees.people
+
+
+def make_executor(workers):
+    """
+    Returns a process pool whose workers are forked, with the graph
+    already loaded, before the event loop starts.
+    """
+    executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    for future in [executor.submit(int) for _ in range(workers)]:
+        future.result()
+    return executor
+
+
+async def serve(server, host, port, socket_path):
+    """
+    Serves requests on a Unix socket if `socket_path` is given, otherwise on TCP.
+    """
+    if socket_path is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees of separation queries over HTTP.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--cache-size", type=int, default=100000)
+    parser.add_argument("--snapshot", action="store_true", help="map the graph from a binary snapshot")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="K", help="use A* with K landmarks")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True, snapshot=args.snapshot, landmarks=args.landmarks)
+    # Built now, as building it in a request would block the event loop
+    degrees.get_name_index()
+    print("Data loaded.")
+
+    with make_executor(args.workers) as executor:
+        server = Server(executor, args.cache_size)
+        print(f"Listening on {args.socket or f'{args.host}:{args.port}'}")
+        asyncio.run(serve(server, args.host, args.port, args.socket))
+
+
+if __name__ == "__main__":
+    main()
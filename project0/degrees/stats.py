@@ -0,0 +1,88 @@
+"""
+Instrumentation for searches and data loading.
+
+Pass a SearchStats as `stats` to degrees.shortest_path or load_data to
+collect nodes expanded, peak frontier size and phase timings. Without one
+the searches use NULL_STATS, whose hooks do nothing: neighbor functions
+are returned unwrapped and the timers are a shared no-op context manager.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class SearchStats():
+    enabled = True
+
+    def __init__(self):
+        self.expanded = 0
+        self.frontier_peak = 0
+        # Phase name -> seconds, e.g. "neighbors", "path", "load people.csv"
+        self.timings = {}
+
+    def neighbors(self, neighbors):
+        """
+        Wraps a neighbor function so every call counts as one expanded
+        node and the time spent producing its neighbors is added to the
+        "neighbors" phase. Lazy neighbor generators stay lazy.
+        """
+        def timed(*args):
+            self.expanded += 1
+            iterator = iter(neighbors(*args))
+            while True:
+                start = time.perf_counter()
+                try:
+                    neighbor = next(iterator)
+                except StopIteration:
+                    self.add_time("neighbors", time.perf_counter() - start)
+                    return
+                self.add_time("neighbors", time.perf_counter() - start)
+                yield neighbor
+        return timed
+
+    def frontier(self, size):
+        """
+        Records the current frontier size.
+        """
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Adds the time spent in the `with` block to a phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "frontier_peak": self.frontier_peak,
+            "timings": dict(self.timings),
+        }
+
+
+class NullStats():
+    enabled = False
+
+    def neighbors(self, neighbors):
+        return neighbors
+
+    def frontier(self, size):
+        pass
+
+    def timer(self, phase):
+        return NULL_TIMER
+
+    def add_time(self, phase, seconds):
+        pass
+
+
+NULL_STATS = NullStats()
+NULL_TIMER = nullcontext()
@@ -0,0 +1,81 @@
+"""
+Synthetic IMDB-like dataset generator.
+
+Writes people.csv, movies.csv and stars.csv in the same format as the
+`small` directory. Casts are drawn from a Zipf-like (power-law)
+popularity distribution over people, so a few prolific actors appear in
+many movies while most appear in one or two, like in the real data.
+The output only depends on the arguments and the seed.
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+
+SYLLABLES = ["ka", "ren", "mo", "li", "sa", "tor", "vin", "el", "da", "nu", "bri", "gan", "ros", "te", "wil", "ja"]
+
+
+def generate(directory, num_people, num_movies, cast_size=(2, 6), exponent=1.0, seed=0):
+    """
+    Writes a dataset with `num_people` people and `num_movies` movies to
+    `directory`. Each movie gets between cast_size[0] and cast_size[1]
+    distinct stars, person `i` being picked with weight 1 / (i + 1) ** exponent.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    person_ids = rng.sample(range(1, num_people * 10 + 1), num_people)
+    movie_ids = rng.sample(range(1, num_movies * 10 + 1), num_movies)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            writer.writerow([person_id, f"{word(rng)} {word(rng)}", rng.randint(1900, 2005)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id in movie_ids:
+            writer.writerow([movie_id, f"The {word(rng)} {word(rng)}", rng.randint(1920, 2023)])
+
+    # Shuffle who is popular so popularity does not follow id order
+    popularity = person_ids[:]
+    rng.shuffle(popularity)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(num_people)))
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in movie_ids:
+            size = min(rng.randint(*cast_size), num_people)
+            cast = set()
+            while len(cast) < size:
+                cast.update(rng.choices(popularity, cum_weights=cumulative, k=size - len(cast)))
+            for person_id in sorted(cast):
+                writer.writerow([person_id, movie_id])
+
+
+def word(rng):
+    """
+    Returns a random capitalized name of two or three syllables.
+    """
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic people/movies/stars dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=50000)
+    parser.add_argument("--min-cast", type=int, default=2)
+    parser.add_argument("--max-cast", type=int, default=6)
+    parser.add_argument("--exponent", type=float, default=1.0, help="power-law exponent of actor popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.directory, args.people, args.movies, (args.min_cast, args.max_cast), args.exponent, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,698 @@
+import asyncio
+import itertools
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+import alternatives
+import analytics
+import batch
+import benchmark
+import components
+import degrees
+import ingest
+import landmarks
+import name_index
+import server
+import snapshot
+import synthetic
+from stats import SearchStats
+from graph import Graph
+from movie_filter import MovieFilter
+from util import Node, PriorityFrontier, QueueFrontier, StackFrontier
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+KEVIN_BACON = "102"
+TOM_HANKS = "158"
+EMMA_WATSON = "914612"
+
+
+def load_small():
+    """
+    Loads the small dataset into the dictionaries of degrees, unless it
+    is already loaded.
+    """
+    if not degrees.people:
+        degrees.load_data(SMALL)
+
+
+def temporary_directory(test):
+    """
+    Returns a new temporary directory, removed when the test ends.
+    """
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory)
+    return directory
+
+
+def copy_of_small(test):
+    """
+    Returns a temporary directory holding a copy of the small dataset's
+    CSV files, removed when the test ends.
+    """
+    directory = temporary_directory(test)
+    for name in snapshot.SOURCES:
+        shutil.copy(os.path.join(SMALL, name), directory)
+    return directory
+
+
+def is_valid_path(source, target, path):
+    person_id = source
+    for movie_id, next_id in path:
+        stars = degrees.movies[movie_id]["stars"]
+        if person_id not in stars or next_id not in stars:
+            return False
+        person_id = next_id
+    return person_id == target
+
+
+class ShortestPathTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+
+    def test_shortest_path(self):
+        path = degrees.shortest_path(KEVIN_BACON, TOM_HANKS)
+        self.assertEqual(1, len(path))
+        self.assertTrue(is_valid_path(KEVIN_BACON, TOM_HANKS, path))
+
+    def test_bidirectional_matches_breadth_first_search(self):
+        for source in degrees.people:
+            for target in degrees.people:
+                expected = degrees.shortest_path(source, target)
+                path = degrees.shortest_path(source, target, bidirectional=True)
+                if expected is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertEqual(len(expected), len(path))
+                    self.assertTrue(is_valid_path(source, target, path))
+
+    def test_not_connected(self):
+        self.assertIsNone(degrees.shortest_path(KEVIN_BACON, EMMA_WATSON, bidirectional=True))
+
+
+class GraphTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+        cls.graph = Graph.from_csv(SMALL)
+
+    def test_matches_dictionaries(self):
+        converted = Graph.from_data(degrees.people, degrees.movies)
+        for person_id in degrees.people:
+            expected = degrees.neighbors_for_person(person_id)
+            self.assertEqual(expected, self.graph.neighbors_for_person(person_id))
+            self.assertEqual(expected, converted.neighbors_for_person(person_id))
+
+    def test_shortest_path(self):
+        for source in degrees.people:
+            for target in degrees.people:
+                expected = degrees.shortest_path(source, target)
+                for bidirectional in (False, True):
+                    path = self.graph.shortest_path(source, target, bidirectional)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertEqual(len(expected), len(path))
+                        self.assertTrue(is_valid_path(source, target, path))
+
+    def test_new_neighbors_skip_reached_people(self):
+        reached = {KEVIN_BACON, TOM_HANKS}
+        expected = {
+            (movie_id, person_id) for movie_id, person_id in degrees.neighbors_for_person(KEVIN_BACON)
+            if person_id not in reached
+        }
+        self.assertEqual(expected, set(degrees.new_neighbors(KEVIN_BACON, reached)))
+        self.assertEqual(expected, set(self.graph.new_neighbors_for_person(KEVIN_BACON, reached)))
+
+    def test_compact_dispatch(self):
+        self.addCleanup(setattr, degrees, "graph", None)
+        self.addCleanup(setattr, degrees, "component_index", None)
+        degrees.graph = self.graph
+        degrees.component_index = None
+        self.assertEqual("Kevin Bacon", degrees.person_details(KEVIN_BACON)["name"])
+        self.assertEqual(1, len(degrees.shortest_path(KEVIN_BACON, TOM_HANKS)))
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = copy_of_small(self)
+
+    def test_round_trip(self):
+        graph = snapshot.load_graph(self.directory)
+        path = snapshot.snapshot_path(self.directory)
+        self.assertTrue(os.path.exists(path))
+
+        mapped = snapshot.read_snapshot(path, snapshot.fingerprint(self.directory))
+        self.assertIsNotNone(mapped)
+        self.assertEqual(graph.person_names, mapped.person_names)
+        self.assertEqual(list(graph.movie_stars), list(mapped.movie_stars))
+        self.assertEqual(graph.neighbors_for_person(KEVIN_BACON), mapped.neighbors_for_person(KEVIN_BACON))
+        self.assertEqual(1, len(mapped.shortest_path(KEVIN_BACON, TOM_HANKS)))
+
+    def test_invalidated_by_changed_csv(self):
+        snapshot.load_graph(self.directory)
+        with open(os.path.join(self.directory, "stars.csv"), "a", encoding="utf-8") as f:
+            f.write("914612,112384\n")
+        sources = snapshot.fingerprint(self.directory)
+        self.assertIsNone(snapshot.read_snapshot(snapshot.snapshot_path(self.directory), sources))
+
+        graph = snapshot.load_graph(self.directory)
+        self.assertEqual(1, len(graph.shortest_path(KEVIN_BACON, EMMA_WATSON)))
+        self.assertIsNotNone(snapshot.read_snapshot(snapshot.snapshot_path(self.directory), sources))
+
+    def test_truncated_or_corrupt_files_are_rebuilt(self):
+        graph = snapshot.load_graph(self.directory)
+        components.load_index(graph, self.directory)
+        landmarks.load_index(graph, self.directory, 2)
+        sources = snapshot.fingerprint(self.directory)
+        files = [
+            (snapshot.snapshot_path(self.directory), snapshot.MAGIC,
+             lambda path: snapshot.read_snapshot(path, sources)),
+            (components.index_path(self.directory), components.MAGIC,
+             lambda path: components.map_file(path, components.MAGIC, components.VERSION, sources, ("labels",))),
+            (landmarks.index_path(self.directory), landmarks.MAGIC,
+             lambda path: landmarks.read_index(path, sources, len(graph.person_ids))),
+        ]
+        header = json.dumps({"version": 1, "byteorder": sys.byteorder, "sources": sources,
+                             "sections": [["labels", "i", 1, 0]]}).encode("utf-8")
+        for path, magic, read in files:
+            for contents in (magic + b"\0", magic + struct.pack("<I", 100) + b"{}",
+                             magic + struct.pack("<I", 2) + b"[]",
+                             magic + struct.pack("<I", len(header)) + header):
+                with open(path, "wb") as f:
+                    f.write(contents)
+                self.assertIsNone(read(path))
+
+        with open(snapshot.snapshot_path(self.directory), "wb") as f:
+            f.write(snapshot.MAGIC + b"\0")
+        self.assertEqual(graph.person_ids, snapshot.load_graph(self.directory).person_ids)
+        self.assertIsNotNone(snapshot.read_snapshot(snapshot.snapshot_path(self.directory), sources))
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, degrees, "graph", degrees.graph)
+        self.addCleanup(setattr, degrees, "component_index", degrees.component_index)
+        degrees.graph = Graph.from_csv(SMALL)
+        degrees.component_index = None
+
+    def test_paths_from_shared_source(self):
+        paths = degrees.graph.paths_from(KEVIN_BACON, [TOM_HANKS, EMMA_WATSON, KEVIN_BACON])
+        self.assertEqual(1, len(paths[TOM_HANKS]))
+        self.assertIsNone(paths[EMMA_WATSON])
+        self.assertEqual([], paths[KEVIN_BACON])
+
+    def test_run(self):
+        pairs = batch.read_pairs(io.StringIO(f"source,target\n{KEVIN_BACON},{TOM_HANKS}\n"
+                                             f"{KEVIN_BACON},{EMMA_WATSON}\n{TOM_HANKS},nobody\n"))
+        for workers in (1, 2):
+            output = io.StringIO()
+            batch.run(pairs, workers, output)
+            records = {(r["source"], r["target"]): r for r in map(json.loads, output.getvalue().splitlines())}
+            self.assertEqual(3, len(records))
+            self.assertEqual(1, records[KEVIN_BACON, TOM_HANKS]["degrees"])
+            self.assertIsNone(records[KEVIN_BACON, EMMA_WATSON]["path"])
+            self.assertEqual("unknown person", records[TOM_HANKS, "nobody"]["error"])
+
+
+class LandmarkTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+        cls.graph = Graph.from_csv(SMALL)
+
+    def test_a_star_matches_breadth_first_search(self):
+        index = landmarks.LandmarkIndex.build(self.graph, 3)
+        for source in degrees.people:
+            for target in degrees.people:
+                expected = degrees.shortest_path(source, target)
+                path = index.shortest_path(self.graph, source, target)
+                if expected is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertEqual(len(expected), len(path))
+                    self.assertTrue(is_valid_path(source, target, path))
+
+    def test_persisted_next_to_dataset(self):
+        directory = copy_of_small(self)
+
+        index = landmarks.load_index(self.graph, directory, 2)
+        path = landmarks.index_path(directory)
+        mapped = landmarks.read_index(path, snapshot.fingerprint(directory), len(self.graph.person_ids))
+        self.assertEqual(index.landmarks, mapped.landmarks)
+        self.assertEqual([list(d) for d in index.distances], [list(d) for d in mapped.distances])
+
+
+class ComponentsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+        cls.graph = Graph.from_csv(SMALL)
+
+    def test_labels_match_search(self):
+        by_id = components.Components.from_data(degrees.people, degrees.movies)
+        by_index = components.Components.from_graph(self.graph)
+        for source in degrees.people:
+            for target in degrees.people:
+                expected = degrees.bidirectional_shortest_path(source, target) is not None
+                self.assertEqual(expected, by_id.connected(source, target))
+                self.assertEqual(expected, by_index.connected(self.graph.person_index[source],
+                                                              self.graph.person_index[target]))
+
+    def test_not_connected_without_search(self):
+        def no_search(*args, **kwargs):
+            raise AssertionError("searched for a path between people who are not connected")
+
+        for name in ("new_neighbors", "graph", "component_index"):
+            self.addCleanup(setattr, degrees, name, getattr(degrees, name))
+        self.addCleanup(setattr, Graph, "new_neighbors", Graph.new_neighbors)
+        degrees.new_neighbors = no_search
+        Graph.new_neighbors = no_search
+        for graph in (None, self.graph):
+            degrees.graph = graph
+            degrees.component_index = None
+            for bidirectional in (False, True):
+                self.assertIsNone(degrees.shortest_path(KEVIN_BACON, EMMA_WATSON, bidirectional=bidirectional))
+
+    def test_persisted_next_to_dataset(self):
+        directory = copy_of_small(self)
+
+        computed = components.load_index(self.graph, directory)
+        self.assertTrue(os.path.exists(components.index_path(directory)))
+        mapped = components.load_index(self.graph, directory)
+        self.assertIsInstance(mapped.labels, memoryview)
+        self.assertEqual(list(computed.labels), list(mapped.labels))
+
+
+class ServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+
+    def test_reverse_path(self):
+        for source in degrees.people:
+            for target in degrees.people:
+                path = degrees.shortest_path(source, target)
+                if path is not None:
+                    self.assertTrue(is_valid_path(target, source, server.reverse_path(source, path)))
+
+    def test_search_is_bidirectional_without_landmarks(self):
+        calls = []
+        self.addCleanup(setattr, degrees, "shortest_path", degrees.shortest_path)
+        self.addCleanup(setattr, degrees, "landmark_index", degrees.landmark_index)
+        degrees.shortest_path = lambda source, target, **options: calls.append(options)
+        degrees.landmark_index = None
+        server.search(KEVIN_BACON, TOM_HANKS)
+        degrees.landmark_index = landmarks.LandmarkIndex.build(Graph.from_csv(SMALL), 2)
+        server.search(KEVIN_BACON, TOM_HANKS)
+        self.assertEqual([{"bidirectional": True}, {"bidirectional": False}], calls)
+
+    def test_cache_serves_reversed_pairs(self):
+        cache = server.PathCache(1)
+        path = degrees.shortest_path(TOM_HANKS, "1597")
+        cache.put(TOM_HANKS, "1597", path)
+        hit, reversed_path = cache.get("1597", TOM_HANKS)
+        self.assertTrue(hit)
+        self.assertTrue(is_valid_path("1597", TOM_HANKS, reversed_path))
+
+        cache.put(KEVIN_BACON, EMMA_WATSON, None)
+        self.assertEqual((True, None), cache.get(EMMA_WATSON, KEVIN_BACON))
+        self.assertEqual((False, None), cache.get(TOM_HANKS, "1597"))
+
+    def test_respond(self):
+        app = server.Server(None, 10)
+        status, body = asyncio.run(app.respond(f"GET /shortest_path?source={KEVIN_BACON}&target={TOM_HANKS} HTTP/1.1"))
+        self.assertEqual(200, status)
+        self.assertEqual(1, body["degrees"])
+        self.assertEqual(1, len(app.cache.entries))
+
+        status, body = asyncio.run(app.respond(f"GET /shortest_path?source={KEVIN_BACON}&target=0 HTTP/1.1"))
+        self.assertEqual(404, status)
+
+
+class NameIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+
+    def test_prefix(self):
+        self.assertEqual(["129", "158"], degrees.get_name_index().prefix("tom"))
+        self.assertEqual(["158"], degrees.get_name_index().prefix("Tom H"))
+        self.assertEqual([], degrees.get_name_index().prefix("zz"))
+
+    def test_fuzzy(self):
+        self.assertEqual(KEVIN_BACON, degrees.get_name_index().fuzzy("kevn bakon", 1)[0])
+        self.assertEqual(EMMA_WATSON, degrees.search_names("Ema Watsn")[0])
+
+    def test_fuzzy_ranks_a_bounded_set_of_candidates(self):
+        names = {f"person {number:05}": {str(number)} for number in range(5000)}
+        names["kevin bacon"] = {KEVIN_BACON}
+        index = name_index.NameIndex(names)
+        self.assertEqual(KEVIN_BACON, index.fuzzy("kevin bacn", 1)[0])
+        self.assertEqual(KEVIN_BACON, index.fuzzy("xevin bacon", 1)[0])
+        self.assertEqual("1234", index.fuzzy("persn 01234", 1)[0])
+
+        index.add("Emma Watson", EMMA_WATSON)
+        self.assertEqual(EMMA_WATSON, index.fuzzy("amma watson", 1)[0])
+        self.assertEqual(EMMA_WATSON, index.fuzzy("emma watsn", 1)[0])
+
+    def test_search_prefers_prefix_matches(self):
+        index = name_index.NameIndex({"tom hanks": {"1"}, "tomas": {"2"}, "atom": {"3"}})
+        self.assertEqual(["1", "2", "3"], index.search("tom"))
+        self.assertEqual(["1"], index.search("tom", 1))
+
+
+class StatsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+        cls.graph = Graph.from_csv(SMALL)
+
+    def test_search_stats(self):
+        searches = [
+            lambda stats: degrees.shortest_path(KEVIN_BACON, "1597", stats=stats),
+            lambda stats: degrees.shortest_path(KEVIN_BACON, "1597", bidirectional=True, stats=stats),
+            lambda stats: self.graph.shortest_path(KEVIN_BACON, "1597", stats=stats),
+            lambda stats: self.graph.shortest_path(KEVIN_BACON, "1597", bidirectional=True, stats=stats),
+            lambda stats: landmarks.LandmarkIndex.build(self.graph, 2).shortest_path(
+                self.graph, KEVIN_BACON, "1597", stats=stats),
+        ]
+        for search in searches:
+            stats = SearchStats()
+            self.assertEqual(3, len(search(stats)))
+            self.assertGreater(stats.expanded, 0)
+            self.assertGreater(stats.frontier_peak, 0)
+            self.assertIn("neighbors", stats.timings)
+            self.assertIn("path", stats.timings)
+
+    def test_load_stats(self):
+        stats = SearchStats()
+        Graph.from_csv(SMALL, stats)
+        for name in snapshot.SOURCES:
+            self.assertIn(f"load {name}", stats.timings)
+
+
+class MovieFilterTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+
+    def setUp(self):
+        self.graph = Graph.from_csv(SMALL)
+        self.index = landmarks.LandmarkIndex.build(self.graph, 2)
+
+    def searches(self, source, target, movie_filter):
+        return [
+            degrees.shortest_path(source, target, movie_filter=movie_filter),
+            degrees.shortest_path(source, target, bidirectional=True, movie_filter=movie_filter),
+            self.graph.shortest_path(source, target, movie_filter=movie_filter),
+            self.graph.shortest_path(source, target, bidirectional=True, movie_filter=movie_filter),
+            self.index.shortest_path(self.graph, source, target, movie_filter=movie_filter),
+        ]
+
+    def test_only_allowed_movies(self):
+        nineties = MovieFilter(since=1990)
+        for path in self.searches(KEVIN_BACON, "705", nineties):
+            self.assertEqual(2, len(path))
+            self.assertTrue(is_valid_path(KEVIN_BACON, "705", path))
+            for movie_id, _ in path:
+                self.assertGreaterEqual(int(degrees.movies[movie_id]["year"]), 1990)
+
+        # Mandy Patinkin is only connected through The Princess Bride (1987)
+        self.assertEqual([None] * 5, self.searches(KEVIN_BACON, "1597", nineties))
+        for movie_filter in (MovieFilter(until=1990), MovieFilter(decades=[1980])):
+            self.assertEqual([None] * 5, self.searches(KEVIN_BACON, TOM_HANKS, movie_filter))
+
+    def test_public_functions_with_a_graph(self):
+        nineties = MovieFilter(since=1990)
+        for name in ("graph", "component_index"):
+            self.addCleanup(setattr, degrees, name, getattr(degrees, name))
+        neighbors = []
+        for graph in (None, self.graph):
+            degrees.graph = graph
+            degrees.component_index = None
+            self.assertIsNone(degrees.bidirectional_shortest_path(KEVIN_BACON, "1597", movie_filter=nineties))
+            self.assertEqual(2, len(degrees.bidirectional_shortest_path(KEVIN_BACON, "705", movie_filter=nineties)))
+            neighbors.append(set(degrees.all_neighbors(nineties)(KEVIN_BACON)))
+        self.assertEqual(neighbors[0], neighbors[1])
+        self.assertTrue(neighbors[0])
+        for movie_id, _ in neighbors[0]:
+            self.assertGreaterEqual(int(degrees.movies[movie_id]["year"]), 1990)
+
+    def test_masks(self):
+        movie_filter = MovieFilter(1990, 1994, decades=[1990])
+        mask = movie_filter.mask(self.graph)
+        self.assertEqual(
+            {"104257", "109830"},
+            {self.graph.movie_ids[movie] for movie in range(len(mask)) if mask[movie]}
+        )
+        self.assertEqual({1980, 1990}, set(self.graph.decade_bitmaps()))
+
+        # Masks, year column and decade bitmaps follow inserted movies
+        movie = self.graph.insert_movie("1", "Title", "1993")
+        self.assertIs(mask, movie_filter.mask(self.graph))
+        self.assertEqual(1, mask[movie])
+        self.assertEqual(1993, self.graph.year_column()[movie])
+        self.assertEqual(1, self.graph.decade_bitmaps()[1990][movie])
+        self.assertEqual(0, self.graph.decade_bitmaps()[1980][movie])
+
+
+class AlternativesTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+
+    def setUp(self):
+        self.addCleanup(setattr, degrees, "graph", None)
+        self.addCleanup(setattr, degrees, "component_index", None)
+
+    def modes(self):
+        for graph in (None, Graph.from_csv(SMALL)):
+            degrees.graph = graph
+            degrees.component_index = None
+            yield graph
+
+    def test_all_shortest_paths(self):
+        for _ in self.modes():
+            paths = list(degrees.all_shortest_paths(KEVIN_BACON, "1597"))
+            self.assertEqual({TOM_HANKS, "641"}, {path[0][1] for path in paths})
+            for path in paths:
+                self.assertEqual(3, len(path))
+                self.assertTrue(is_valid_path(KEVIN_BACON, "1597", path))
+            self.assertEqual([[]], list(degrees.all_shortest_paths(KEVIN_BACON, KEVIN_BACON)))
+            self.assertEqual([], list(degrees.all_shortest_paths(KEVIN_BACON, EMMA_WATSON)))
+
+    def test_shortest_path_dag(self):
+        dag = alternatives.shortest_path_dag(degrees.neighbors_for_person, KEVIN_BACON, "1597")
+        self.assertEqual({("112384", TOM_HANKS), ("112384", "641")}, set(dag[KEVIN_BACON]))
+        self.assertEqual([("93779", "1597")], dag["705"])
+
+    def test_k_shortest_paths(self):
+        for _ in self.modes():
+            paths = degrees.k_shortest_paths(KEVIN_BACON, "1597", 5)
+            self.assertEqual([3, 3, 4, 4, 4], [len(path) for path in paths])
+            self.assertEqual(5, len(set(map(tuple, paths))))
+            for path in paths:
+                self.assertTrue(is_valid_path(KEVIN_BACON, "1597", path))
+                self.assertEqual(len(path), len({person_id for _, person_id in path}))
+
+    def test_k_shortest_paths_are_exhaustive(self):
+        # A triangle of people in two movies has exactly two simple paths from 0 to 2
+        edges = {0: [("a", 1), ("b", 2)], 1: [("a", 0), ("a", 2)], 2: [("b", 0), ("a", 1)]}
+        paths = alternatives.k_shortest_paths(lambda person: edges[person], 0, 2, 10)
+        self.assertEqual([[("b", 2)], [("a", 1), ("a", 2)]], paths)
+        shortest = alternatives.all_shortest_paths(lambda person: edges[person], 0, 2)
+        self.assertEqual([[("b", 2)]], list(itertools.islice(shortest, 10)))
+
+
+class AnalyticsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_small()
+        cls.graph = Graph.from_csv(SMALL)
+
+    def test_histograms_match_breadth_first_search(self):
+        sources = list(degrees.people)
+        histograms = analytics.multi_source_bfs(self.graph, [self.graph.person_index[s] for s in sources])
+        for source, histogram in zip(sources, histograms):
+            lengths = [0]
+            for target in degrees.people:
+                path = degrees.shortest_path(source, target)
+                if path:
+                    lengths.append(len(path))
+            self.assertEqual([lengths.count(d) for d in range(max(lengths) + 1)], histogram)
+
+    def test_analyze(self):
+        results = analytics.analyze(self.graph, [KEVIN_BACON, EMMA_WATSON])
+        self.assertEqual(3, results[KEVIN_BACON]["eccentricity"])
+        self.assertEqual(15, results[KEVIN_BACON]["reached"])
+        self.assertGreater(results[KEVIN_BACON]["closeness"], 0)
+        self.assertEqual({"reached": 1, "eccentricity": 0, "average_degrees": None, "closeness": 0.0,
+                          "histogram": [1]}, results[EMMA_WATSON])
+
+        overview = analytics.overview(results)
+        self.assertEqual({"0": 1, "3": 1}, overview["eccentricity_histogram"])
+        self.assertEqual(16, sum(overview["distance_histogram"]))
+
+    def test_at_most_64_sources(self):
+        with self.assertRaises(ValueError):
+            analytics.multi_source_bfs(self.graph, [0] * (analytics.WIDTH + 1))
+
+
+class IngestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = copy_of_small(self)
+        with open(os.path.join(self.directory, "movies.csv"), "a", encoding="utf-8") as f:
+            f.write('1,"A Title\nOver, ""Two"" Lines",2001\n')
+        with open(os.path.join(self.directory, "stars.csv"), "a", encoding="utf-8") as f:
+            f.write("102,1\n102,404\n404,1\n")
+
+    def test_chunks_keep_quoted_records_whole(self):
+        path = os.path.join(self.directory, "movies.csv")
+        parsed = [row for chunk in ingest.chunks(path, ingest.COLUMNS["movies.csv"], 1)
+                  for row in ingest.parse_chunk(chunk)]
+        self.assertEqual(list(ingest.rows(path, ingest.COLUMNS["movies.csv"])), parsed)
+        self.assertEqual(("1", 'A Title\nOver, "Two" Lines', "2001"), parsed[-1])
+
+    def test_graph_counts_dangling_stars(self):
+        graph = Graph.from_csv(self.directory)
+        parallel = Graph.from_csv(self.directory, workers=2)
+        self.assertEqual(2, graph.dangling_stars)
+        self.assertEqual(2, parallel.dangling_stars)
+        self.assertEqual(graph.person_ids, parallel.person_ids)
+        self.assertEqual(list(graph.movie_stars), list(parallel.movie_stars))
+
+    def test_load_data_counts(self):
+        for name in ("names", "name_index", "people", "movies", "graph", "component_index", "landmark_index"):
+            self.addCleanup(setattr, degrees, name, getattr(degrees, name))
+        for workers in (1, 2):
+            counts = degrees.load_data(self.directory, workers=workers)
+            self.assertEqual({"people": 16, "movies": 6, "stars": 21, "dangling": 2}, counts)
+            self.assertEqual({KEVIN_BACON}, degrees.movies["1"]["stars"])
+
+        counts = degrees.load_data(self.directory, compact=True)
+        self.assertEqual({"people": 16, "movies": 6, "stars": 21, "dangling": 2}, counts)
+        self.assertEqual({}, degrees.people)
+        self.assertIsNone(degrees.names)
+        self.assertEqual(KEVIN_BACON, degrees.person_id_for_name("Kevin Bacon"))
+        self.assertEqual({KEVIN_BACON}, degrees.names["kevin bacon"])
+
+        degrees.load_data(self.directory, landmarks=2)
+        self.assertIsNotNone(degrees.landmark_index)
+        degrees.load_data(copy_of_small(self), compact=True)
+        self.assertIsNone(degrees.landmark_index)
+        self.assertEqual(1, len(degrees.shortest_path(KEVIN_BACON, TOM_HANKS)))
+
+        degrees.load_data(SMALL)
+        self.assertIsNone(degrees.graph)
+        self.assertNotIn("1", degrees.movies)
+        self.assertEqual(1, len(degrees.shortest_path(KEVIN_BACON, TOM_HANKS)))
+
+
+class UpdatesTestCase(unittest.TestCase):
+    def setUp(self):
+        for name in ("names", "name_index", "people", "movies", "graph", "component_index", "landmark_index"):
+            self.addCleanup(setattr, degrees, name, getattr(degrees, name))
+
+        self.updates = temporary_directory(self)
+        with open(os.path.join(self.updates, "people.csv"), "w", encoding="utf-8") as f:
+            f.write('id,name,birth\n1,"Rupert Grint",1988\n914612,"Emma Watson",1990\n')
+        with open(os.path.join(self.updates, "movies.csv"), "w", encoding="utf-8") as f:
+            f.write('id,title,year\n241527,"Harry Potter",2001\n')
+        with open(os.path.join(self.updates, "stars.csv"), "w", encoding="utf-8") as f:
+            f.write("person_id,movie_id\n1,241527\n914612,241527\n1,112384\n1,112384\n2,241527\n")
+
+    def check_updates(self):
+        self.assertIsNone(degrees.shortest_path(KEVIN_BACON, EMMA_WATSON))
+        counts = degrees.apply_updates(self.updates)
+        self.assertEqual({"people": 1, "movies": 1, "stars": 3, "skipped": 3}, counts)
+
+        path = degrees.shortest_path(KEVIN_BACON, EMMA_WATSON)
+        self.assertEqual(2, len(path))
+        self.assertEqual(("241527", EMMA_WATSON), path[-1])
+        self.assertEqual(["1"], degrees.get_name_index().prefix("rupert"))
+        self.assertEqual("1", degrees.person_id_for_name("Rupert Grint"))
+
+    def test_dictionaries(self):
+        degrees.load_data(SMALL)
+        self.assertIsNone(degrees.name_index)
+        # An index built before the updates is updated in place
+        degrees.get_name_index()
+        self.check_updates()
+
+    def test_compact_graph_with_landmarks(self):
+        degrees.load_data(copy_of_small(self), landmarks=3)
+        self.check_updates()
+
+        rebuilt = landmarks.LandmarkIndex(degrees.landmark_index.landmarks, [
+            landmarks.distances_from(degrees.graph, landmark) for landmark in degrees.landmark_index.landmarks
+        ])
+        self.assertEqual([list(d) for d in rebuilt.distances], [list(d) for d in degrees.landmark_index.distances])
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = temporary_directory(self)
+        synthetic.generate(self.directory, 300, 150, seed=1)
+
+    def test_generate_is_seeded(self):
+        other = temporary_directory(self)
+        synthetic.generate(other, 300, 150, seed=1)
+        for name in snapshot.SOURCES:
+            with open(os.path.join(self.directory, name)) as f, open(os.path.join(other, name)) as g:
+                self.assertEqual(f.read(), g.read())
+
+        graph = Graph.from_csv(self.directory)
+        self.assertEqual(300, len(graph.person_ids))
+        self.assertEqual(150, len(graph.movie_ids))
+
+    def test_benchmark(self):
+        results = benchmark.benchmark(self.directory, ["dict", "snapshot"], 20, 0, 2)
+        json.dumps(results)
+        self.assertTrue(results["consistent"])
+        self.assertEqual(20, results["connected"])
+        self.assertEqual({"bfs", "bidirectional", "astar"}, set(results["modes"]["snapshot"]["searches"]))
+        self.assertGreater(results["modes"]["dict"]["peak_rss_kb"], 0)
+        self.assertGreater(results["modes"]["dict"]["components_seconds"], 0)
+
+
+class FrontierTestCase(unittest.TestCase):
+    def test_stack_and_queue_order(self):
+        stack, queue = StackFrontier(), QueueFrontier()
+        for state in "abc":
+            stack.add(Node(state, None, None))
+            queue.add(Node(state, None, None))
+        self.assertEqual("c", stack.remove().state)
+        self.assertEqual("a", queue.remove().state)
+        self.assertFalse(queue.contains_state("a"))
+        self.assertTrue(queue.contains_state("b"))
+
+    def test_node_has_no_instance_dictionary(self):
+        node = Node(KEVIN_BACON, None, None)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.cost = 1
+
+    def test_priority_frontier(self):
+        frontier = PriorityFrontier()
+        frontier.add(Node("far", None, None), 3)
+        frontier.add(Node("near", None, None), 1)
+        frontier.add(Node("near", None, None), 2)
+        self.assertEqual("near", frontier.remove().state)
+        self.assertTrue(frontier.contains_state("near"))
+        self.assertEqual("near", frontier.remove().state)
+        self.assertFalse(frontier.contains_state("near"))
+        self.assertEqual("far", frontier.remove().state)
+        self.assertTrue(frontier.empty())
+        self.assertRaises(Exception, frontier.remove)
+
+
+if __name__ == '__main__':
+    unittest.main()
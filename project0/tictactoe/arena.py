@@ -0,0 +1,242 @@
+"""
+Headless self-play arena for Tic Tac Toe.
+
+Plays games between two agents across a process pool and reports, as
+JSON, the results, the games per second and for each agent the nodes
+searched and the latency of its moves. Every position reached and every
+move played by a searching agent is then checked against the solved
+table: all the engines must agree on the value of each position and
+every move they choose must be optimal.
+
+Each worker keeps the transposition tables of its engines across its
+games, as the runner would across moves, unless `--cold` clears them
+before every move.
+
+    python arena.py minimax random --games 100 --workers 4
+    python arena.py alphabeta table --games 1000 --openings 2 --output arena.json
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import bitboard
+import table
+import tictactoe as ttt
+
+# Agent name -> (function of a board and a random generator returning a
+# move, node counter key of the engine or None)
+AGENTS = {
+    "minimax": (lambda board, rng: ttt.minimax(board), ("tictactoe", "minimax")),
+    "alphabeta": (lambda board, rng: ttt.alphabeta(board), ("tictactoe", "alphabeta")),
+    "bitboard": (lambda board, rng: bitboard.minimax(board), ("bitboard", "bitboard")),
+    "table": (lambda board, rng: table.minimax(board), None),
+    "random": (lambda board, rng: rng.choice(sorted(ttt.actions(board))), None),
+}
+
+# Agents that should always play an optimal move
+SEARCHING = ("minimax", "alphabeta", "bitboard", "table")
+
+NODE_COUNTS = {"tictactoe": ttt.node_counts, "bitboard": bitboard.node_counts}
+
+
+def nodes(agent):
+    """
+    Returns the node counter of the engine of an agent, 0 for agents that
+    do not search.
+    """
+    counter = AGENTS[agent][1]
+    return 0 if counter is None else NODE_COUNTS[counter[0]][counter[1]]
+
+
+def clear_caches():
+    """
+    Empties the transposition tables of the engines.
+    """
+    ttt.transpositions.clear()
+    bitboard.values.clear()
+
+
+def init_worker(table_path):
+    """
+    Loads the solved table in a worker process.
+    """
+    table.load(table_path)
+
+
+def play(game):
+    """
+    Plays one game of (index, X agent, O agent, seed, random opening
+    moves, cold). Returns the winner, the (x_bits, o_bits) positions
+    reached and, for every move, its agent, position, cell, latency in
+    seconds and nodes searched.
+    """
+    index, x_agent, o_agent, seed, openings, cold = game
+    rng = random.Random(seed * 1_000_003 + index)
+    board = ttt.initial_state()
+    positions = [bitboard.encode(board)]
+    moves = []
+
+    while not ttt.terminal(board):
+        if len(moves) < openings:
+            agent, move, latency, searched = "opening", rng.choice(sorted(ttt.actions(board))), 0.0, 0
+        else:
+            agent = x_agent if ttt.player(board) == ttt.X else o_agent
+            if cold:
+                clear_caches()
+            choose = AGENTS[agent][0]
+            before = nodes(agent)
+            started = time.perf_counter()
+            move = choose(board, rng)
+            latency = time.perf_counter() - started
+            searched = nodes(agent) - before
+        moves.append((agent, positions[-1], 3 * move[0] + move[1], latency, searched))
+        board = ttt.result(board, move)
+        positions.append(bitboard.encode(board))
+
+    return {"winner": ttt.winner(board), "positions": positions, "moves": moves}
+
+
+def run(x_agent, o_agent, games, workers=1, seed=0, openings=0, cold=False, table_path=None):
+    """
+    Plays `games` games of x_agent against o_agent, in a process pool if
+    there is more than one worker, and returns the played games and the
+    seconds they took.
+    """
+    for agent in (x_agent, o_agent):
+        if agent not in AGENTS:
+            raise ValueError(f"Unknown agent {agent}, choose from {', '.join(AGENTS)}")
+    jobs = [(index, x_agent, o_agent, seed, openings, cold) for index in range(games)]
+
+    started = time.perf_counter()
+    if workers <= 1:
+        init_worker(table_path)
+        played = [play(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(table_path,)) as pool:
+            played = pool.map(play, jobs, chunksize=max(1, games // (4 * workers)))
+    return played, time.perf_counter() - started
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """
+    Returns the nearest-rank percentiles and the maximum of some values.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    found = {f"p{point}": ordered[max(0, -(-point * len(ordered) // 100) - 1)] for point in points}
+    found["max"] = ordered[-1]
+    return found
+
+
+def engine_values(x_bits, o_bits):
+    """
+    Returns the value of a position for X according to every engine.
+    """
+    board = bitboard.decode(x_bits, o_bits)
+    if ttt.player(board) == ttt.X:
+        exhaustive = ttt.max_value(board)[0]
+        pruned = ttt.alpha_beta_max(board, -1, 1)[0]
+    else:
+        exhaustive = ttt.min_value(board)[0]
+        pruned = ttt.alpha_beta_min(board, -1, 1)[0]
+    return {
+        "minimax": exhaustive,
+        "alphabeta": pruned,
+        "bitboard": bitboard.best_move(x_bits, o_bits)[0],
+        "table": table.lookup(board)[0],
+    }
+
+
+def verify(played):
+    """
+    Checks every distinct position of the played games on every engine,
+    and every move of a searching agent against the optimal moves of the
+    solved table. Returns the counts and the first few disagreements.
+    """
+    positions = {position for game in played for position in game["positions"]}
+    disagreements = []
+    for x_bits, o_bits in sorted(positions):
+        found = engine_values(x_bits, o_bits)
+        if len(set(found.values())) > 1:
+            disagreements.append({"board": bitboard.decode(x_bits, o_bits), "values": found})
+
+    checked = set()
+    for game in played:
+        for agent, (x_bits, o_bits), cell, _, _ in game["moves"]:
+            if agent in SEARCHING and (agent, x_bits, o_bits, cell) not in checked:
+                checked.add((agent, x_bits, o_bits, cell))
+                if not table.table[x_bits | o_bits << 9][1] >> cell & 1:
+                    disagreements.append({
+                        "board": bitboard.decode(x_bits, o_bits), "agent": agent, "move": divmod(cell, 3),
+                    })
+
+    return {
+        "positions": len(positions),
+        "moves": len(checked),
+        "disagreements": len(disagreements),
+        "examples": disagreements[:10],
+    }
+
+
+def report(x_agent, o_agent, played, seconds, workers):
+    """
+    Returns the JSON report of the played games.
+    """
+    results = {"X": 0, "O": 0, "tie": 0}
+    for game in played:
+        results[game["winner"] or "tie"] += 1
+
+    agents = {}
+    for agent in dict.fromkeys((x_agent, o_agent)):
+        moves = [move for game in played for move in game["moves"] if move[0] == agent]
+        agents[agent] = {
+            "moves": len(moves),
+            "nodes_per_move": sum(move[4] for move in moves) / len(moves) if moves else None,
+            "latency_ms": {key: value * 1000 for key, value in percentiles([move[3] for move in moves]).items()},
+        }
+
+    return {
+        "x": x_agent,
+        "o": o_agent,
+        "games": len(played),
+        "workers": workers,
+        "seconds": seconds,
+        "games_per_second": len(played) / seconds if seconds else None,
+        "results": results,
+        "agents": agents,
+        "agreement": verify(played),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Tic Tac Toe agents against each other.")
+    parser.add_argument("x", choices=AGENTS, help="agent playing X")
+    parser.add_argument("o", choices=AGENTS, help="agent playing O")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--openings", type=int, default=0, metavar="N", help="play the first N moves at random")
+    parser.add_argument("--cold", action="store_true", help="clear the transposition tables before every move")
+    parser.add_argument("--table", help="solved table file, by default the one next to table.py")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    played, seconds = run(args.x, args.o, args.games, workers=args.workers, seed=args.seed,
+                          openings=args.openings, cold=args.cold, table_path=args.table)
+    table.load(args.table)
+    result = report(args.x, args.o, played, seconds, args.workers)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    if result["agreement"]["disagreements"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
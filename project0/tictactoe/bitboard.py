@@ -0,0 +1,193 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is a pair of 9-bit integers, the cells of X and the cells of
+O, with cell (i, j) at bit 3 * i + j. A move sets one bit, a win is one
+of eight line masks being fully set, and the position is its own
+transposition table key.
+
+The functions named like the ones in tictactoe.py take and return the
+runner's list boards, converting them with encode and decode. Together
+with X, O, EMPTY and initial_state, re-exported from tictactoe.py, they
+make `import bitboard as ttt` work in runner.py.
+"""
+from tictactoe import EMPTY, O, X, initial_state
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Whether a set of cells contains a line, for every 9-bit set of cells
+WINS = bytes(any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1))
+
+# Cells in the order they are tried: center, corners, edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# (cells of the player to move, cells of the other player) -> value for
+# the player to move, shared by every search in the process
+values = {}
+
+# Positions visited by negamax
+node_counts = {"bitboard": 0}
+
+
+def encode(board):
+    """
+    Returns the (X cells, O cells) bitboards of a list board.
+    """
+    x_bits = o_bits = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x_bits |= 1 << (3 * i + j)
+            elif cell == O:
+                o_bits |= 1 << (3 * i + j)
+    return x_bits, o_bits
+
+
+def decode(x_bits, o_bits):
+    """
+    Returns the list board of (X cells, O cells) bitboards.
+    """
+    board = initial_state()
+    for cell in range(9):
+        if x_bits >> cell & 1:
+            board[cell // 3][cell % 3] = X
+        elif o_bits >> cell & 1:
+            board[cell // 3][cell % 3] = O
+    return board
+
+
+def x_to_move(x_bits, o_bits):
+    """
+    Returns whether X moves next on a position.
+    """
+    return bin(x_bits).count("1") == bin(o_bits).count("1")
+
+
+def negamax(own, other):
+    """
+    Returns the value of a position for the player to move, whose cells
+    are `own`: 1 for a forced win, 0 for a draw, -1 for a forced loss.
+    A position stops being searched as soon as a winning move is found.
+    """
+    node_counts["bitboard"] += 1
+    key = (own, other)
+    v = values.get(key)
+    if v is not None:
+        return v
+
+    occupied = own | other
+    if WINS[other]:
+        v = -1
+    elif occupied == FULL:
+        v = 0
+    else:
+        v = -1
+        for cell in MOVE_ORDER:
+            bit = 1 << cell
+            if not occupied & bit:
+                child = -negamax(other, own | bit)
+                if child > v:
+                    v = child
+                    if v == 1:
+                        break
+    values[key] = v
+    return v
+
+
+def best_move(x_bits, o_bits):
+    """
+    Returns the value of a position for X and the best cell for the
+    player to move, or None as the cell if the game is over.
+    """
+    x_moves = x_to_move(x_bits, o_bits)
+    own, other = (x_bits, o_bits) if x_moves else (o_bits, x_bits)
+    if WINS[other] or own | other == FULL:
+        v = -1 if WINS[other] else 0
+        return (v if x_moves else -v), None
+
+    best_value, best_cell = -2, None
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if not (own | other) & bit:
+            child = -negamax(other, own | bit)
+            if child > best_value:
+                best_value, best_cell = child, cell
+                if best_value == 1:
+                    break
+    return (best_value if x_moves else -best_value), best_cell
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if x_to_move(*encode(board)) else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x_bits, o_bits = encode(board)
+    free = FULL & ~(x_bits | o_bits)
+    return {divmod(cell, 3) for cell in range(9) if free >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise ValueError(f"Invalid action {action}")
+    x_bits, o_bits = encode(board)
+    bit = 1 << (3 * i + j)
+    if (x_bits | o_bits) & bit:
+        raise ValueError(f"Invalid action {action}: cell is taken")
+    if x_to_move(x_bits, o_bits):
+        return decode(x_bits | bit, o_bits)
+    return decode(x_bits, o_bits | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x_bits, o_bits = encode(board)
+    if WINS[x_bits]:
+        return X
+    if WINS[o_bits]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x_bits, o_bits = encode(board)
+    return bool(WINS[x_bits] or WINS[o_bits]) or x_bits | o_bits == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x_bits, o_bits = encode(board)
+    return 1 if WINS[x_bits] else -1 if WINS[o_bits] else 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    cell = best_move(*encode(board))[1]
+    return None if cell is None else divmod(cell, 3)
+
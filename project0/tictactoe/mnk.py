@@ -0,0 +1,347 @@
+"""
+m,n,k game engine: boards of any number of rows and columns, won by k
+in a row, such as 4x4 or 5x5 four in a row.
+
+A position is a pair of bitboards, the cells of the player to move and
+the cells of the other player, with cell (i, j) at bit i * cols + j.
+minimax runs an iterative-deepening negamax alpha-beta search under a
+wall-clock budget per move: every finished depth leaves its best move
+in a transposition table that orders the moves of the next depth, and
+when time runs out the move of the deepest finished search is played.
+Positions below the search horizon are scored by a heuristic that counts
+the stones of each player in the lines still open to them.
+
+The module functions play on `game`, 3x3 three in a row by default, and
+take and return the runner's list boards like the ones in tictactoe.py:
+
+    mnk.configure(5, 5, 4, budget=1.0)
+    board = mnk.initial_state()
+    move = mnk.minimax(board)
+"""
+import time
+
+from tictactoe import EMPTY, O, X
+
+# Score of a won position, and the bound above which a score is a win.
+# A win loses a point per move it takes, so shorter wins score higher
+WIN = 1_000_000
+WON = WIN - 1000
+
+# Transposition table entry flags: exact value, lower or upper bound
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Nodes searched between two looks at the clock
+CLOCK_INTERVAL = 1024
+
+
+class OutOfTime(Exception):
+    """
+    Raised inside a search when the budget of the move is spent.
+    """
+
+
+class Game:
+    def __init__(self, rows=3, cols=3, k=3, budget=1.0, max_entries=1_000_000):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError(f"Cannot get {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.budget = budget
+        self.max_entries = max_entries
+        self.full = (1 << (rows * cols)) - 1
+
+        # Every line of k cells, and the lines through each cell
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    if 0 <= i + (k - 1) * di < rows and 0 <= j + (k - 1) * dj < cols:
+                        self.lines.append(sum(1 << ((i + s * di) * cols + j + s * dj) for s in range(k)))
+        self.lines_through = [
+            [line for line in self.lines if line >> cell & 1] for cell in range(rows * cols)
+        ]
+
+        # Cells nearest the center first
+        center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+        self.move_order = sorted(
+            range(rows * cols),
+            key=lambda cell: abs(cell // cols - center_i) + abs(cell % cols - center_j),
+        )
+
+        # Heuristic score of a line holding 0..k stones of one player only
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # (own cells, other cells) -> (depth, flag, value, best cell)
+        self.transpositions = {}
+        self.node_count = 0
+        self.deadline = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def encode(self, board):
+        """
+        Returns the (X cells, O cells) bitboards of a list board.
+        """
+        if len(board) != self.rows or any(len(row) != self.cols for row in board):
+            raise ValueError(f"Board is not {self.rows}x{self.cols}")
+        x_bits = o_bits = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x_bits |= 1 << (i * self.cols + j)
+                elif cell == O:
+                    o_bits |= 1 << (i * self.cols + j)
+        return x_bits, o_bits
+
+    def decode(self, x_bits, o_bits):
+        """
+        Returns the list board of (X cells, O cells) bitboards.
+        """
+        board = self.initial_state()
+        for cell in range(self.rows * self.cols):
+            if x_bits >> cell & 1:
+                board[cell // self.cols][cell % self.cols] = X
+            elif o_bits >> cell & 1:
+                board[cell // self.cols][cell % self.cols] = O
+        return board
+
+    def has_line(self, bits):
+        """
+        Returns whether a set of cells contains k in a row.
+        """
+        return any(bits & line == line for line in self.lines)
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_bits, o_bits = self.encode(board)
+        return X if bin(x_bits).count("1") == bin(o_bits).count("1") else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        x_bits, o_bits = self.encode(board)
+        free = self.full & ~(x_bits | o_bits)
+        return {divmod(cell, self.cols) for cell in range(self.rows * self.cols) if free >> cell & 1}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols):
+            raise ValueError(f"Invalid action {action}")
+        if board[i][j] != EMPTY:
+            raise ValueError(f"Invalid action {action}: cell is taken")
+        after = [list(row) for row in board]
+        after[i][j] = self.player(board)
+        return after
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x_bits, o_bits = self.encode(board)
+        if self.has_line(x_bits):
+            return X
+        if self.has_line(o_bits):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x_bits, o_bits = self.encode(board)
+        return self.has_line(x_bits) or self.has_line(o_bits) or x_bits | o_bits == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, budget=None):
+        """
+        Returns the best action for the current player on the board found
+        within the budget in seconds, or None if the game is over.
+        """
+        return self.search(board, budget)[0]
+
+    def search(self, board, budget=None):
+        """
+        Searches a board one depth deeper at a time until the budget in
+        seconds is spent, the game tree is searched to its end or a win is
+        proven. Returns the best action, its score for the player to move
+        and the deepest finished depth. Depth 1 is always finished.
+        """
+        if self.terminal(board):
+            return None, 0, 0
+        x_bits, o_bits = self.encode(board)
+        own, other = (x_bits, o_bits) if self.player(board) == X else (o_bits, x_bits)
+        empty_cells = bin(self.full & ~(own | other)).count("1")
+        if len(self.transpositions) > self.max_entries:
+            self.transpositions.clear()
+
+        started = time.perf_counter()
+        budget = self.budget if budget is None else budget
+        best = (None, 0, 0)
+        for depth in range(1, empty_cells + 1):
+            # The first depth runs to the end, so there is always a move
+            self.deadline = None if depth == 1 else started + budget
+            try:
+                v = self.negamax(own, other, depth, -WIN - 1, WIN + 1)
+            except OutOfTime:
+                break
+            cell = self.transpositions[(own, other)][3]
+            best = (divmod(cell, self.cols), v, depth)
+            if abs(v) > WON or time.perf_counter() - started >= budget:
+                break
+        return best
+
+    def negamax(self, own, other, depth, alpha, beta, last=None):
+        """
+        Returns the score of a position for the player to move, searched
+        `depth` moves deep within the window (alpha, beta). `last` is the
+        cell the other player just took, the only place a new line can be.
+        """
+        self.node_count += 1
+        if self.deadline is not None and self.node_count % CLOCK_INTERVAL == 0:
+            if time.perf_counter() > self.deadline:
+                raise OutOfTime()
+
+        if last is not None and any(other & line == line for line in self.lines_through[last]):
+            return -WIN
+        occupied = own | other
+        if occupied == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(own, other)
+
+        key = (own, other)
+        entry = self.transpositions.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, flag, value, first = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        original_alpha = alpha
+        v, best = -WIN - 1, None
+        order = self.move_order if first is None else [first] + [c for c in self.move_order if c != first]
+        for cell in order:
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            child = -self.negamax(other, own | bit, depth - 1, -beta, -alpha, cell)
+            # Wins and losses further away are worth less
+            if child > WON:
+                child -= 1
+            elif child < -WON:
+                child += 1
+            if child > v:
+                v, best = child, cell
+                alpha = max(alpha, v)
+                if alpha >= beta:
+                    break
+
+        flag = UPPER if v <= original_alpha else LOWER if v >= beta else EXACT
+        self.transpositions[key] = (depth, flag, v, best)
+        return v
+
+    def evaluate(self, own, other):
+        """
+        Returns the heuristic score of a position for the player to move:
+        each line without stones of the other player counts for the stones
+        of the player in it, and the lines of the other player count against.
+        """
+        score = 0
+        for line in self.lines:
+            mine, theirs = own & line, other & line
+            if mine and not theirs:
+                score += self.weights[bin(mine).count("1")]
+            elif theirs and not mine:
+                score -= self.weights[bin(theirs).count("1")]
+        return score
+
+
+# The game the module functions play
+game = Game()
+
+
+def configure(rows=3, cols=3, k=3, budget=1.0):
+    """
+    Switches the module functions to a new game and returns it.
+    """
+    global game
+    game = Game(rows, cols, k, budget)
+    return game
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return game.initial_state()
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return game.player(board)
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return game.actions(board)
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    return game.result(board, action)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return game.winner(board)
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return game.terminal(board)
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return game.utility(board)
+
+
+def minimax(board):
+    """
+    Returns the best action for the current player on the board found
+    within the budget of the game.
+    """
+    return game.minimax(board)
@@ -2,6 +2,7 @@ import pygame
 import sys
 import time
 
+import table
 import tictactoe as ttt
 
 pygame.init()
@@ -17,6 +18,9 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Perfect play is read from the solved table, one lookup per AI move
+table.load()
+
 user = None
 board = ttt.initial_state()
 ai_turn = False
@@ -115,7 +119,7 @@ while True:
             if ai_turn:
                 time.sleep(0.5)
                 print("board before minimax in runner: {}".format(board))
-                move = ttt.minimax(board)
+                move = table.minimax(board)
                 print("move: {}".format(move))
                 board = ttt.result(board, move)
                 print("board after move: {}".format(board))
@@ -0,0 +1,159 @@
+"""
+Perfect-play lookup table for Tic Tac Toe.
+
+The offline solver walks all 5,478 legal positions with the bitboard
+engine and records, for each one, its value for X and every optimal
+cell. The table is written as a small binary file, one 32-bit record per
+position, sorted by position:
+
+    bits  0-8   cells of X
+    bits  9-17  cells of O
+    bits 18-26  optimal cells for the player to move
+    bits 27-28  value for X plus one
+
+The loader reads it back into a dictionary, so minimax(board) is a single
+lookup. If the file is missing or unreadable it is solved again and
+rewritten.
+
+    python table.py [path]
+"""
+import os
+import sys
+from array import array
+
+import bitboard
+
+MAGIC = b"TTTTAB01"
+FILENAME = "tictactoe.table"
+POSITIONS = 5478
+
+# Position key -> (value for X, optimal cells bitmask), once loaded
+table = None
+
+
+def table_path():
+    """
+    Returns where the table is kept, next to this module.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILENAME)
+
+
+def solve():
+    """
+    Returns the table of every legal position, mapping its key to its
+    value for X and the bitmask of the optimal cells for the player to move.
+    """
+    solved = {}
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        key = x_bits | o_bits << 9
+        if key in solved:
+            continue
+
+        x_moves = bitboard.x_to_move(x_bits, o_bits)
+        own, other = (x_bits, o_bits) if x_moves else (o_bits, x_bits)
+        v = bitboard.negamax(own, other)
+        best = 0
+        if not bitboard.WINS[other] and own | other != bitboard.FULL:
+            for cell in range(9):
+                bit = 1 << cell
+                if (own | other) & bit:
+                    continue
+                if -bitboard.negamax(other, own | bit) == v:
+                    best |= bit
+                stack.append((x_bits | bit, o_bits) if x_moves else (x_bits, o_bits | bit))
+        solved[key] = (v if x_moves else -v, best)
+    return solved
+
+
+def write_table(solved, path):
+    """
+    Writes a solved table to `path`, replacing any previous file atomically.
+    """
+    records = array("I", (
+        key | best << 18 | (v + 1) << 27
+        for key, (v, best) in sorted(solved.items())
+    ))
+    if sys.byteorder != "little":
+        records.byteswap()
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(records.tobytes())
+    os.replace(temporary, path)
+
+
+def read_table(path):
+    """
+    Reads a table written by write_table. Returns None if the file is
+    missing or is not a complete table.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + 4 * POSITIONS:
+        return None
+
+    records = array("I")
+    records.frombytes(data[len(MAGIC):])
+    if sys.byteorder != "little":
+        records.byteswap()
+    return {
+        record & 0x3FFFF: ((record >> 27 & 0b11) - 1, record >> 18 & 0x1FF)
+        for record in records
+    }
+
+
+def load(path=None):
+    """
+    Loads the table into memory, solving and writing it first if needed,
+    and returns it.
+    """
+    global table
+    path = path or table_path()
+    loaded = read_table(path)
+    if loaded is None:
+        loaded = solve()
+        try:
+            write_table(loaded, path)
+        except OSError:
+            pass
+    table = loaded
+    return table
+
+
+def lookup(board):
+    """
+    Returns the value for X and the optimal cells bitmask of a board.
+    """
+    if table is None:
+        load()
+    x_bits, o_bits = bitboard.encode(board)
+    return table[x_bits | o_bits << 9]
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board, the
+    first optimal cell in the bitboard engine's center, corners, edges
+    order, or None if the game is over.
+    """
+    best = lookup(board)[1]
+    for cell in bitboard.MOVE_ORDER:
+        if best >> cell & 1:
+            return divmod(cell, 3)
+    return None
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else table_path()
+    solved = solve()
+    write_table(solved, path)
+    print(f"Wrote {len(solved)} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
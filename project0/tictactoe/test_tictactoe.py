@@ -0,0 +1,283 @@
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+import unittest
+
+import arena
+import bitboard
+import mnk
+import table
+import tictactoe as ttt
+
+X, O, EMPTY = ttt.X, ttt.O, ttt.EMPTY
+
+
+def board_of(text):
+    """
+    Returns the board of a 9 character string of X, O and "." for empty.
+    """
+    cells = [{"X": X, "O": O, ".": EMPTY}[c] for c in text]
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+def value(board):
+    """
+    Returns the minimax value of a board.
+    """
+    if ttt.player(board) == X:
+        return ttt.max_value(board)[0]
+    return ttt.min_value(board)[0]
+
+
+class TicTacToeTestCase(unittest.TestCase):
+    def test_winner_on_every_line(self):
+        lines = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+        for line in lines:
+            for sign in (X, O):
+                cells = ["."] * 9
+                for k in line:
+                    cells[k] = sign
+                board = board_of("".join(cells))
+                self.assertEqual(sign, ttt.winner(board))
+                self.assertTrue(ttt.terminal(board))
+
+    def test_full_board_is_a_tie(self):
+        board = board_of("XOXXOOOXX")
+        self.assertIsNone(ttt.winner(board))
+        self.assertTrue(ttt.terminal(board))
+        self.assertEqual(0, ttt.utility(board))
+
+    def test_minimax_takes_and_blocks_wins(self):
+        self.assertEqual((0, 2), ttt.minimax(board_of("XX.OO....")))
+        self.assertEqual((0, 2), ttt.minimax(board_of("XX..O....")))
+
+    def test_transpositions_fold_symmetries(self):
+        ttt.transpositions.clear()
+        self.assertIn(ttt.minimax(ttt.initial_state()), ttt.actions(ttt.initial_state()))
+        # Positions up to rotation and reflection, terminal ones included
+        self.assertEqual(765, len(ttt.transpositions))
+        self.assertEqual(0, ttt.max_value(ttt.initial_state())[0])
+
+        # Every rotation and reflection of a position gets the matching move
+        cells = "XX.OO...."
+        for symmetry in ttt.SYMMETRIES:
+            board = board_of("".join(cells[k] for k in symmetry))
+            move = 3 * ttt.minimax(board)[0] + ttt.minimax(board)[1]
+            self.assertEqual(2, symmetry[move])
+        self.assertEqual(765, len(ttt.transpositions))
+
+    def test_alphabeta_matches_minimax(self):
+        for text in ("XX.OO....", "XX..O....", "X...O....", "XO.......", "X.O.X.O.."):
+            board = board_of(text)
+            after = ttt.result(board, ttt.alphabeta(board))
+            self.assertEqual(value(board), value(after))
+        self.assertIsNone(ttt.alphabeta(board_of("XXXOO....")))
+
+    def test_ordered_actions(self):
+        self.assertEqual([(0, 2), (2, 0), (0, 1)], ttt.ordered_actions(board_of("X..OXO.XO")))
+
+    def test_silent_unless_traced(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ttt.minimax(board_of("X...O...."))
+        self.assertEqual("", output.getvalue())
+        self.assertFalse(ttt.tracing)
+
+    def test_tracing(self):
+        events = []
+        with ttt.traced(lambda event, fields: events.append((event, fields))) as counts:
+            ttt.transpositions.clear()
+            ttt.minimax(board_of("XX.OO...."))
+        self.assertFalse(ttt.tracing)
+        self.assertIn(("minimax", {"board": board_of("XX.OO...."), "player": X}), events)
+        self.assertEqual(len(events), sum(counts.values()))
+        self.assertEqual(counts["max_value"] + counts["min_value"], sum(1 for e, _ in events if e.endswith("_value")))
+        self.assertIn("result", counts)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), ttt.traced(ttt.print_tracer):
+            ttt.utility(board_of("XXXOO...."))
+        self.assertIn("utility ", output.getvalue())
+        self.assertIn("utility=1", output.getvalue())
+
+    def test_node_report(self):
+        tables = ttt.transpositions
+        report = ttt.node_report(board_of("X...O...."))
+        self.assertLess(report["transpositions"], report["exhaustive"])
+        self.assertLess(report["alphabeta"], report["exhaustive"])
+        self.assertIs(tables, ttt.transpositions)
+        self.assertTrue(ttt.use_transpositions)
+
+
+class BitboardTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        board = board_of("XO..X...O")
+        self.assertEqual((0b000010001, 0b100000010), bitboard.encode(board))
+        self.assertEqual(board, bitboard.decode(*bitboard.encode(board)))
+
+    def test_rules_match_list_engine(self):
+        for text in ("XX.OO....", "XXXOO....", "XOXXOOOXX", "OOOXX.XX.", "X.O.X.O..", "........."):
+            board = board_of(text)
+            self.assertEqual(ttt.winner(board), bitboard.winner(board))
+            self.assertEqual(ttt.terminal(board), bitboard.terminal(board))
+            self.assertEqual(ttt.utility(board), bitboard.utility(board))
+            if not ttt.terminal(board):
+                self.assertEqual(ttt.player(board), bitboard.player(board))
+                self.assertEqual(ttt.actions(board), bitboard.actions(board))
+                move = bitboard.minimax(board)
+                self.assertEqual(ttt.result(board, move), bitboard.result(board, move))
+                self.assertEqual(value(board), value(bitboard.result(board, move)))
+
+    def test_drop_in_for_runner(self):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "runner.py"), encoding="utf-8") as f:
+            used = set(re.findall(r"\bttt\.(\w+)", f.read())) | {"minimax"}
+        for name in used:
+            self.assertTrue(hasattr(bitboard, name), name)
+            if not callable(getattr(ttt, name)):
+                self.assertEqual(getattr(ttt, name), getattr(bitboard, name))
+        self.assertIn("EMPTY", used)
+
+    def test_invalid_action(self):
+        with self.assertRaises(ValueError):
+            bitboard.result(board_of("X........"), (0, 0))
+
+    def test_opening_value(self):
+        self.assertEqual(0, bitboard.best_move(0, 0)[0])
+        self.assertIsNone(bitboard.minimax(board_of("XXXOO....")))
+
+
+class TableTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.path = os.path.join(directory.name, table.FILENAME)
+        table.write_table(table.solve(), cls.path)
+
+    def setUp(self):
+        table.load(self.path)
+
+    def test_every_position(self):
+        self.assertEqual(table.POSITIONS, len(table.table))
+        with open(self.path, "rb") as f:
+            self.assertEqual(table.MAGIC, f.read(len(table.MAGIC)))
+        self.assertEqual((0, 0b111111111), table.lookup(ttt.initial_state()))
+
+    def test_values_and_best_moves(self):
+        for text in ("XX.OO....", "XX..O....", "X...O....", "X.O.X.O..", "XOXXOOOXX"):
+            board = board_of(text)
+            x_bits, o_bits = bitboard.encode(board)
+            v, best = table.lookup(board)
+            self.assertEqual(bitboard.best_move(x_bits, o_bits)[0], v)
+            for i, j in ttt.actions(board) if not ttt.terminal(board) else ():
+                after = bitboard.encode(ttt.result(board, (i, j)))
+                self.assertEqual(bitboard.best_move(*after)[0] == v, bool(best >> (3 * i + j) & 1))
+        self.assertEqual((0, 2), table.minimax(board_of("XX.OO....")))
+        self.assertEqual((1, 1), table.minimax(ttt.initial_state()))
+        self.assertIsNone(table.minimax(board_of("XXXOO....")))
+
+    def test_corrupt_file_is_solved_again(self):
+        with open(self.path, "r+b") as f:
+            f.write(b"garbage!")
+        table.load(self.path)
+        self.assertEqual(table.POSITIONS, len(table.table))
+        self.assertIsNotNone(table.read_table(self.path))
+
+
+class ArenaTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        cls.path = os.path.join(directory.name, table.FILENAME)
+
+    def test_optimal_agents_never_lose(self):
+        played, seconds = arena.run("random", "alphabeta", 10, seed=1, table_path=self.path)
+        result = arena.report("random", "alphabeta", played, seconds, 1)
+        self.assertEqual(10, result["games"])
+        self.assertEqual(0, result["results"]["X"])
+        self.assertEqual(0, result["agreement"]["disagreements"])
+        self.assertGreater(result["agents"]["alphabeta"]["nodes_per_move"], 0)
+        self.assertEqual(0, result["agents"]["random"]["nodes_per_move"])
+        self.assertEqual({"p50", "p90", "p99", "max"}, set(result["agents"]["alphabeta"]["latency_ms"]))
+
+    def test_games_are_seeded(self):
+        first = arena.run("table", "random", 5, seed=3, openings=2, table_path=self.path)[0]
+        again = arena.run("table", "random", 5, seed=3, openings=2, table_path=self.path)[0]
+        self.assertEqual([g["positions"] for g in first], [g["positions"] for g in again])
+        self.assertTrue(all(g["moves"][0][0] == "opening" for g in first))
+        with self.assertRaises(ValueError):
+            arena.run("table", "perfect", 1, table_path=self.path)
+
+    def test_verify_catches_a_losing_move(self):
+        table.load(self.path)
+        x_bits, o_bits = bitboard.encode(board_of("XX.OO...."))
+        game = {"winner": None, "positions": [(x_bits, o_bits)], "moves": [("table", (x_bits, o_bits), 8, 0.0, 0)]}
+        agreement = arena.verify([game])
+        self.assertEqual(1, agreement["disagreements"])
+        self.assertEqual((2, 2), agreement["examples"][0]["move"])
+
+    def test_percentiles(self):
+        self.assertEqual({"p50": 50, "p90": 90, "p99": 99, "max": 100}, arena.percentiles(range(1, 101)))
+        self.assertEqual({}, arena.percentiles([]))
+
+
+class MnkTestCase(unittest.TestCase):
+    def test_lines(self):
+        self.assertEqual(8, len(mnk.Game(3, 3, 3).lines))
+        self.assertEqual(10, len(mnk.Game(4, 4, 4).lines))
+        self.assertEqual(28, len(mnk.Game(5, 5, 4).lines))
+        with self.assertRaises(ValueError):
+            mnk.Game(3, 3, 4)
+
+    def test_rules_match_list_engine(self):
+        game = mnk.Game()
+        for text in ("XX.OO....", "XXXOO....", "XOXXOOOXX", "OOOXX.XX.", "X.O.X.O..", "........."):
+            board = board_of(text)
+            self.assertEqual(ttt.winner(board), game.winner(board))
+            self.assertEqual(ttt.terminal(board), game.terminal(board))
+            self.assertEqual(ttt.utility(board), game.utility(board))
+            if not ttt.terminal(board):
+                self.assertEqual(ttt.player(board), game.player(board))
+                self.assertEqual(ttt.actions(board), game.actions(board))
+                move = game.minimax(board)
+                self.assertEqual(ttt.result(board, move), game.result(board, move))
+                self.assertEqual(value(board), value(game.result(board, move)))
+        self.assertIsNone(game.minimax(board_of("XXXOO....")))
+
+    def test_module_functions_play_the_configured_game(self):
+        self.addCleanup(setattr, mnk, "game", mnk.game)
+        game = mnk.configure(4, 4, 4, budget=0.2)
+        self.assertIs(game, mnk.game)
+        board = mnk.initial_state()
+        self.assertEqual(16, len(mnk.actions(board)))
+        board = mnk.result(board, (0, 0))
+        self.assertEqual(O, mnk.player(board))
+        with self.assertRaises(ValueError):
+            mnk.result(board, (0, 0))
+        with self.assertRaises(ValueError):
+            mnk.winner(board_of("........."))
+
+    def test_takes_and_blocks_four_in_a_row(self):
+        game = mnk.Game(4, 4, 4, budget=0.2)
+        rows = {"X": X, "O": O, ".": EMPTY}
+        win = [[rows[c] for c in row] for row in ("XXX.", "OOO.", "....", "....")]
+        self.assertEqual((0, 3), game.minimax(win))
+        block = [[rows[c] for c in row] for row in ("XX..", "OOO.", "X...", "....")]
+        self.assertEqual((1, 3), game.minimax(block))
+
+    def test_budget(self):
+        game = mnk.Game(5, 5, 4, budget=0.1)
+        started = time.perf_counter()
+        move, _, depth = game.search(game.initial_state())
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertIn(move, game.actions(game.initial_state()))
+        self.assertGreaterEqual(depth, 1)
+        self.assertTrue(game.transpositions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,10 +3,86 @@ Tic Tac Toe Player
 """
 import copy
 import sys
+from contextlib import contextmanager
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cell (i, j) of the board is number 3 * i + j. Each of the 8 rotations
+# and reflections of the board is a permutation of the cells: cell k of
+# the transformed board is cell symmetry[k] of the original one
+ROTATION = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+REFLECTION = (2, 1, 0, 5, 4, 3, 8, 7, 6)
+
+
+def board_symmetries():
+    """
+    Returns the 8 rotations and reflections of the board as permutations.
+    """
+    symmetries = []
+    symmetry = tuple(range(9))
+    for _ in range(4):
+        symmetries.append(symmetry)
+        symmetries.append(tuple(symmetry[k] for k in REFLECTION))
+        symmetry = tuple(symmetry[k] for k in ROTATION)
+    return symmetries
+
+
+SYMMETRIES = board_symmetries()
+
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Canonical board key -> (value, best action on the canonical board).
+# Shared by every minimax call in the process, so each position up to
+# symmetry is searched once. Turned off, minimax searches exhaustively
+transpositions = {}
+use_transpositions = True
+
+# Possible actions, center first, then corners, then edges
+MOVE_ORDER = ((1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1))
+
+# Positions visited by each search, for comparing them
+node_counts = {"minimax": 0, "alphabeta": 0}
+
+# Tracing of the game functions, off by default: every call site costs
+# one check of `tracing`. Turned on, each event is counted in
+# trace_counts and, if there is a tracer, passed to it with its fields
+tracing = False
+tracer = None
+trace_counts = {}
+
+
+def trace(event, **fields):
+    """
+    Counts an event and passes it to the tracer, if there is one.
+    """
+    trace_counts[event] = trace_counts.get(event, 0) + 1
+    if tracer is not None:
+        tracer(event, fields)
+
+
+def print_tracer(event, fields):
+    """
+    Prints an event and its fields on one line.
+    """
+    print(event, " ".join(f"{name}={value}" for name, value in fields.items()))
+
+
+@contextmanager
+def traced(event_tracer=None):
+    """
+    Turns tracing on inside a `with` block, with a fresh trace_counts
+    dictionary that it yields, and passes every event to `event_tracer`
+    if given, such as print_tracer.
+    """
+    global tracing, tracer, trace_counts
+    saved = tracing, tracer, trace_counts
+    tracing, tracer, trace_counts = True, event_tracer, {}
+    try:
+        yield trace_counts
+    finally:
+        tracing, tracer, trace_counts = saved
+
 
 def initial_state():
     """
@@ -23,7 +99,8 @@ def player(board):
     """
 
     if board == initial_state():
-        print("board at initial state")
+        if tracing:
+            trace("player", board=board, player=X)
         return X
 
     # Game is already over
@@ -35,8 +112,8 @@ def player(board):
     sum_of_X = sum(list_of_num_of_X)
     sum_of_O = sum(list_of_num_of_O)
 
-    print("sum_of_X: {}".format(sum_of_X))
-    print("sum_of_Y: {}".format(sum_of_O))
+    if tracing:
+        trace("player", board=board, sum_of_X=sum_of_X, sum_of_O=sum_of_O)
 
     if sum_of_X > sum_of_O:
         return O
@@ -53,14 +130,13 @@ def actions(board):
 
     all_possible_actions = set()
 
-    print("board: {}".format(board))
-
     for i, row in enumerate(board):
         for j, character in enumerate(row):
             if character != X and character != O:
                 all_possible_actions.add((i, j))
 
-    print("all_possible_actions: {}".format(all_possible_actions))
+    if tracing:
+        trace("actions", board=board, actions=all_possible_actions)
     return all_possible_actions
 
 
@@ -68,16 +144,7 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    """
-    print("action type:")
-    print(action)
-    print(type(action))
-    """
-
     exception_text = "Invalid action"
-    print("board: {}".format(board))
-    print("player(board): {}".format(player(board)))
-    print("action: {}".format(action))
 
     if not isinstance(action, tuple):
         raise Exception(exception_text)
@@ -87,19 +154,20 @@ def result(board, action):
 
     # Just to make it clear that the original should be left unmodified
     new_board = copy.deepcopy(board)
-    # print("new_board: {}".format(new_board))
 
     new_board[action[0]][action[1]] = player(board)
 
-    print("new_board: {}".format(new_board))
+    if tracing:
+        trace("result", board=board, action=action, new_board=new_board)
 
     return new_board
 
 
 def check_horizontal_winner(board, player_sign):
-    print("board in check_horizontal_winner: {}".format(board))
-    if ((board[0][0] == board[1][0] == board[2][0] == player_sign)
-            or (board[0][0] == board[1][0] == board[2][0] == player_sign)
+    if tracing:
+        trace("check_horizontal_winner", board=board, player_sign=player_sign)
+    if ((board[0][0] == board[0][1] == board[0][2] == player_sign)
+            or (board[1][0] == board[1][1] == board[1][2] == player_sign)
             or (board[2][0] == board[2][1] == board[2][2] == player_sign)):
         return player_sign
     else:
@@ -107,9 +175,9 @@ def check_horizontal_winner(board, player_sign):
 
 
 def check_vertical_winner(board, player_sign):
-    if ((board[0][0] == board[0][1] == board[0][2] == player_sign)
-            or (board[1][0] == board[1][1] == board[1][2] == player_sign)
-            or (board[2][0] == board[2][1] == board[2][2] == player_sign)):
+    if ((board[0][0] == board[1][0] == board[2][0] == player_sign)
+            or (board[0][1] == board[1][1] == board[2][1] == player_sign)
+            or (board[0][2] == board[1][2] == board[2][2] == player_sign)):
         return player_sign
     else:
         return None
@@ -117,7 +185,8 @@ def check_vertical_winner(board, player_sign):
 
 def check_diagonal_winner(board, player_sign):
     # Diagonal
-    if (board[0][0] == board[1][1] == board[2][2] == X) or (board[0][2] == board[1][1] == board[2][0] == player_sign):
+    if ((board[0][0] == board[1][1] == board[2][2] == player_sign)
+            or (board[0][2] == board[1][1] == board[2][0] == player_sign)):
         return player_sign
     else:
         return None
@@ -133,11 +202,8 @@ def winner(board):
     last_sign = ""
     winner_player = None
 
-    print("board in winner: {}".format(board))
-
     # Horizontal
     if winner_player is None:
-        print("winner_player is none board: {}".format(board))
         winner_player = check_horizontal_winner(board, X)
     if winner_player is None:
         winner_player = check_horizontal_winner(board, O)
@@ -150,6 +216,8 @@ def winner(board):
     if winner_player is None:
         winner_player = check_vertical_winner(board, O)
 
+    if tracing:
+        trace("winner", board=board, winner=winner_player)
     return winner_player
 
 
@@ -166,14 +234,13 @@ def terminal(board):
 
         return True
 
-    print("board before winner: {}".format(board))
+    if tracing:
+        trace("terminal", board=board)
     if winner(board) is None:
-        return False
+        # A full board without a winner is a tie
+        return full_board_filled(board)
     else:
-        if winner(board) == X or winner(board) == O or full_board_filled(board):
-            return True
-        else:
-            return False
+        return True
 
 
 def utility(board):
@@ -182,14 +249,17 @@ def utility(board):
     """
     if winner(board) is not None:
         if winner(board) == X:
-            print("return 1")
+            if tracing:
+                trace("utility", board=board, utility=1)
             return 1
 
         if winner(board) == O:
-            print("return O")
+            if tracing:
+                trace("utility", board=board, utility=-1)
             return -1
     else:
-        print("return 0")
+        if tracing:
+            trace("utility", board=board, utility=0)
         return 0
 
 
@@ -197,46 +267,177 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    print("Terminal board check in minimax")
     if terminal(board):
         return None
 
+    if tracing:
+        trace("minimax", board=board, player=player(board))
     if player(board) == X:
-        print("board in minimax: {}".format(board))
         return max_value(board)[1]
     elif player(board) == O:
-        print("board in minimax: {}".format(board))
         return min_value(board)[1]
 
 
 def max_value(board):
+    node_counts["minimax"] += 1
+    key, symmetry = canonical(board) if use_transpositions else (None, None)
+    if key in transpositions:
+        return from_canonical(transpositions[key], symmetry)
+
     best_action_max = None
-    print("Terminal board check in max_value")
-    print("board in max_value: {}".format(board))
+    if tracing:
+        trace("max_value", board=board)
     if terminal(board):
-        return utility(board), best_action_max
+        return remember(key, symmetry, utility(board), best_action_max)
     v = -sys.maxsize - 1
     for action in actions(board):
         min_val = min_value(result(board, action))[0]
         if min_val > v:
             v = min_val
             best_action_max = action
-    return v, best_action_max
+    return remember(key, symmetry, v, best_action_max)
 
 
 def min_value(board):
+    node_counts["minimax"] += 1
+    key, symmetry = canonical(board) if use_transpositions else (None, None)
+    if key in transpositions:
+        return from_canonical(transpositions[key], symmetry)
+
     best_action_min = None
-    print("Terminal board check in min_value")
+    if tracing:
+        trace("min_value", board=board)
     if terminal(board):
-        return utility(board), best_action_min
+        return remember(key, symmetry, utility(board), best_action_min)
     v = sys.maxsize
     for action in actions(board):
-        print("board in min_value: {}".format(board))
         max_val = max_value(result(board, action))[0]
         if max_val < v:
             v = max_val
             best_action_min = action
+    return remember(key, symmetry, v, best_action_min)
+
+
+def canonical(board):
+    """
+    Returns the canonical key of a board, the smallest base-3 encoding
+    among its 8 rotations and reflections, and the symmetry giving it.
+    Boards that are rotations or reflections of each other share a key.
+    """
+    cells = [CELL_CODES[cell] for row in board for cell in row]
+    best_key, best_symmetry = None, None
+    for symmetry in SYMMETRIES:
+        key = 0
+        for k in symmetry:
+            key = key * 3 + cells[k]
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+def remember(key, symmetry, v, action):
+    """
+    Stores the value and best action of a board in the transposition
+    table, with the action moved onto the canonical board.
+    """
+    if key is None:
+        return v, action
+    canonical_action = None
+    if action is not None:
+        canonical_action = symmetry.index(3 * action[0] + action[1])
+    transpositions[key] = (v, canonical_action)
+    return v, action
+
+
+def from_canonical(entry, symmetry):
+    """
+    Returns the value and best action of a transposition table entry,
+    with the action moved back onto a board with the given symmetry.
+    """
+    v, canonical_action = entry
+    if canonical_action is None:
+        return v, None
+    return v, divmod(symmetry[canonical_action], 3)
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board, like
+    minimax, found with alpha-beta pruning instead of a full search.
+    """
+    if terminal(board):
+        return None
+    if player(board) == X:
+        return alpha_beta_max(board, -1, 1)[1]
+    return alpha_beta_min(board, -1, 1)[1]
+
 
-        print("v: {}".format(v))
-        print("best_action_min: {}".format(best_action_min))
-    return v, best_action_min
+def alpha_beta_max(board, alpha, beta):
+    """
+    Returns the value of a board for X and the action achieving it,
+    trying center, corners and edges in turn and stopping as soon as the
+    value reaches `beta`, which includes finding a forced win.
+    """
+    node_counts["alphabeta"] += 1
+    if terminal(board):
+        return utility(board), None
+    v, best_action = -2, None
+    for action in ordered_actions(board):
+        value = alpha_beta_min(result(board, action), alpha, beta)[0]
+        if value > v:
+            v, best_action = value, action
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    return v, best_action
+
+
+def alpha_beta_min(board, alpha, beta):
+    """
+    Returns the value of a board for O and the action achieving it,
+    stopping as soon as the value drops to `alpha`.
+    """
+    node_counts["alphabeta"] += 1
+    if terminal(board):
+        return utility(board), None
+    v, best_action = 2, None
+    for action in ordered_actions(board):
+        value = alpha_beta_max(result(board, action), alpha, beta)[0]
+        if value < v:
+            v, best_action = value, action
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+    return v, best_action
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board in MOVE_ORDER, so that the
+    strongest moves are usually tried, and cut off the search, first.
+    """
+    return [action for action in MOVE_ORDER if board[action[0]][action[1]] == EMPTY]
+
+
+def node_report(board):
+    """
+    Returns how many positions each search visits to choose the move on a
+    board: exhaustive minimax, minimax with an empty transposition table
+    and alpha-beta, as a dictionary.
+    """
+    global transpositions, use_transpositions
+    saved = transpositions, use_transpositions
+    report = {}
+    try:
+        for name, memoized in (("exhaustive", False), ("transpositions", True)):
+            transpositions, use_transpositions = {}, memoized
+            node_counts["minimax"] = 0
+            minimax(board)
+            report[name] = node_counts["minimax"]
+    finally:
+        transpositions, use_transpositions = saved
+
+    node_counts["alphabeta"] = 0
+    alphabeta(board)
+    report["alphabeta"] = node_counts["alphabeta"]
+    return report